@@ -1,50 +1,26 @@
-import json
-import os
 import re
 import logging
-try:
-    # Prefer passlib if available; use pbkdf2_sha256 backend to avoid bcrypt binary
-    from passlib.hash import pbkdf2_sha256 as hasher  # type: ignore
-except Exception:
-    # Fallback to werkzeug if passlib is not installed
-    try:
-        # Import werkzeug dynamically to avoid static import errors in editors
-        import importlib
-        werkzeug_security = importlib.import_module("werkzeug.security")
-        generate_password_hash = getattr(werkzeug_security, "generate_password_hash")
-        check_password_hash = getattr(werkzeug_security, "check_password_hash")
-
-        class _HasherWrapper:
-            @staticmethod
-            def hash(password):
-                return generate_password_hash(password, method="pbkdf2:sha256")
-
-            @staticmethod
-            def verify(password, hashed):
-                # werkzeug.check_password_hash expects (hashed, password)
-                return check_password_hash(hashed, password)
-
-        hasher = _HasherWrapper()
-    except Exception:
-        # Last-resort fallback (insecure plain-text) to avoid runtime errors when
-        # no hashing library is available. Install passlib or werkzeug for proper
-        # password hashing in production.
-        class _PlainWrapper:
-            @staticmethod
-            def hash(password):
-                return password
-
-            @staticmethod
-            def verify(password, hashed):
-                return password == hashed
-
-        hasher = _PlainWrapper()
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from app import config
+from app import metrics
+from app import user_store
+# El esquema de hash vive en app.passwords; se reexporta por compatibilidad
+from app.passwords import hasher
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Directorio de usuarios cacheado: el contenido del almacén (ver user_store) y
+# un índice email -> usuario. Se relee solo si el almacén cambia por fuera.
+_lock = threading.RLock()
+_cache = {"store": None, "stamp": None, "users": None, "by_email": None}
+# Hilos para las variantes *_async; pbkdf2 (hashlib) libera el GIL mientras calcula
+_executor = {"pool": None}
+# Inicialización diferida (admin por defecto): ver init()
+_init_lock = threading.Lock()
+_init = {"done": False}
+
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 
@@ -76,24 +52,98 @@ def validate_password_strength(password: str):
     return True, "Contraseña fuerte"
 
 
+@metrics.timed("auth.load_users")
+def _load(store):
+    return store.load()
+
+
+def _email_index(users):
+    # Si un email se repite gana el primer usuario, como en la búsqueda lineal
+    by_email = {}
+    for username, info in users.items():
+        email = info.get("email")
+        if email is not None:
+            by_email.setdefault(email, username)
+    return by_email
+
+
+def _set_cache(store, users, stamp):
+    _cache.update(store=store, stamp=stamp, users=users, by_email=_email_index(users))
+
+
+def _directory():
+    """Devuelve (usuarios, índice por email) sin copiar; no modificar.
+
+    Solo se lee el almacén la primera vez o si otro proceso lo modificó
+    (otra instancia, create_user.py o una edición a mano).
+    """
+    store = user_store.get_store()
+    with _lock:
+        stamp = store.stamp()
+        if _cache["users"] is None or _cache["store"] is not store or _cache["stamp"] != stamp:
+            metrics.inc("auth.directory_miss")
+            _set_cache(store, _load(store), stamp)
+        return _cache["users"], _cache["by_email"]
+
+
+def _written(store, stamps, apply):
+    """Refleja en la caché una escritura propia sin releer el almacén.
+
+    Solo si la caché estaba al día justo antes de escribir; si otro proceso
+    escribió entremedias se descarta y la próxima consulta relee.
+    """
+    if stamps is None:
+        return
+    before, after = stamps
+    if _cache["users"] is not None and _cache["store"] is store and _cache["stamp"] == before:
+        apply(_cache["users"], _cache["by_email"])
+        _cache["stamp"] = after
+    else:
+        _cache["users"] = None
+
+
+def invalidate_cache():
+    """Descarta el directorio cacheado; la próxima consulta releerá el almacén."""
+    with _lock:
+        _cache["users"] = None
+
+
 def load_users():
-    if not os.path.exists(config.USERS_FILE):
-        return {}
-    try:
-        with open(config.USERS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.exception("Error leyendo users.json: %s", e)
-        return {}
+    """Copia del diccionario de usuarios, que el llamador puede modificar."""
+    users, _ = _directory()
+    return {username: dict(info) for username, info in users.items()}
 
 
+@metrics.timed("auth.save_users")
 def save_users(users):
-    try:
-        with open(config.USERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(users, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        logger.exception("Error guardando users.json: %s", e)
-        raise
+    """Reemplaza todos los usuarios del almacén (escritura atómica)."""
+    store = user_store.get_store()
+    with _lock:
+        try:
+            _, after = store.replace_all(users)
+        except Exception as e:
+            logger.exception("Error guardando usuarios: %s", e)
+            _cache["users"] = None
+            raise
+        _set_cache(store, {username: dict(info) for username, info in users.items()}, after)
+
+
+def _hash(password):
+    with metrics.timer("auth.hash"):
+        return hasher.hash(password)
+
+
+def _verify(password, hashed):
+    with metrics.timer("auth.verify"):
+        return hasher.verify(password, hashed)
+
+
+def _check_new_user(username, email):
+    users, by_email = _directory()
+    if username in users:
+        raise ValueError("El usuario ya existe")
+    if email in by_email:
+        raise ValueError("El email ya está en uso")
 
 
 def add_user(username: str, password: str, email: str) -> bool:
@@ -108,35 +158,47 @@ def add_user(username: str, password: str, email: str) -> bool:
     if not _is_valid_email(email):
         raise ValueError("Email inválido")
 
-    users = load_users()
-    if username in users:
-        raise ValueError("El usuario ya existe")
-    if any(info.get("email") == email for info in users.values()):
-        raise ValueError("El email ya está en uso")
-
-    users[username] = {"password": hasher.hash(password), "email": email}
-    save_users(users)
+    # Comprobación rápida con la caché para no calcular el hash en vano; el
+    # almacén vuelve a comprobarlo dentro de su transacción
+    _check_new_user(username, email)
+    info = {"password": _hash(password), "email": email}
+    store = user_store.get_store()
+    with _lock:
+        stamps = store.add(username, info)
+
+        def apply(users, by_email):
+            users[username] = dict(info)
+            by_email.setdefault(email, username)
+        _written(store, stamps, apply)
     logger.info("Usuario creado: %s", username)
     return True
 
 
 def delete_user(username: str) -> bool:
-    users = load_users()
-    if username not in users:
-        return False
-    del users[username]
-    save_users(users)
+    store = user_store.get_store()
+    with _lock:
+        stamps = store.delete(username)
+        if stamps is None:
+            return False
+
+        def apply(users, by_email):
+            info = users.pop(username, None)
+            if info is not None and by_email.get(info.get("email")) == username:
+                # Otro usuario con el mismo email pasa a ser el del índice
+                by_email.clear()
+                by_email.update(_email_index(users))
+        _written(store, stamps, apply)
     logger.info("Usuario eliminado: %s", username)
     return True
 
 
 def list_users():
-    users = load_users()
+    users, _ = _directory()
     return [{"username": u, "email": info.get("email")} for u, info in users.items()]
 
 
 def get_user_details(username: str):
-    users = load_users()
+    users, _ = _directory()
     if username not in users:
         return None
     info = users[username].copy()
@@ -156,48 +218,139 @@ def create_default_admin():
         try:
             add_user(default_user, default_pwd, default_email)
         except Exception:
-            users = load_users()
-            users[default_user] = {"password": hasher.hash(default_pwd), "email": default_email}
-            save_users(users)
+            info = {"password": _hash(default_pwd), "email": default_email}
+            store = user_store.get_store()
+            with _lock:
+                stamps = store.put(default_user, info)
+
+                def apply(users, by_email):
+                    users[default_user] = dict(info)
+                    by_email.setdefault(default_email, default_user)
+                _written(store, stamps, apply)
     else:
         # Si existe pero su hash no corresponde a la contraseña deseada, re-hashear
         try:
-            hasher.verify(default_pwd, users[default_user]["password"])
+            _verify(default_pwd, users[default_user]["password"])
         except Exception:
-            users[default_user]["password"] = hasher.hash(default_pwd)
-            save_users(users)
+            set_password_for_username(default_user, default_pwd)
+
+
+def init():
+    """Prepara el módulo para su uso: asegura que exista el admin por defecto.
+
+    Importar auth no tiene efectos; esto se hace una sola vez por proceso, la
+    primera vez que se llama (main.py lo lanza en segundo plano al arrancar con
+    init_async() y authenticate lo llama por si aún no se hizo). Idempotente y
+    segura entre hilos: las llamadas concurrentes esperan a la primera.
+    """
+    if _init["done"]:
+        return
+    with _init_lock:
+        if _init["done"]:
+            return
+        try:
+            create_default_admin()
+        except Exception:
+            # Se reintentará en la próxima llamada
+            logger.exception("Error creando el usuario por defecto")
+            return
+        _init["done"] = True
 
 
 def authenticate(username, password):
-    users = load_users()
+    init()
+    users, _ = _directory()
     if username not in users:
+        metrics.inc("auth.login_unknown_user")
         return False
     hashed = users[username]["password"]
     try:
-        return hasher.verify(password, hashed)
+        ok = _verify(password, hashed)
     except Exception:
         # In case of unexpected hash format
         logger.exception("Error verificando contraseña para %s", username)
+        ok = False
+    metrics.inc("auth.login_success" if ok else "auth.login_failure")
+    if ok and hasher.needs_update(hashed):
+        # Hash antiguo (bcrypt o menos rondas de las calibradas): se recalcula
+        # con la contraseña recién verificada, sin retrasar el login
+        _pool().submit(_rehash, username, password, hashed)
+    return ok
+
+
+def _rehash(username, password, old_hash):
+    try:
+        new_hash = _hash(password)
+        store = user_store.get_store()
+        with _lock:
+            # Solo si nadie cambió la contraseña mientras tanto
+            stamps = store.update(username, {"password": new_hash}, expected={"password": old_hash})
+            if stamps is None:
+                return False
+
+            def apply(users, by_email):
+                if username in users:
+                    users[username]["password"] = new_hash
+            _written(store, stamps, apply)
+    except Exception:
+        logger.exception("Error actualizando el hash de %s", username)
         return False
+    metrics.inc("auth.rehash")
+    logger.info("Hash de contraseña actualizado para %s", username)
+    return True
 
 
 def get_username_by_email(email):
-    users = load_users()
-    for u, info in users.items():
-        if info.get("email") == email:
-            return u
-    return None
+    # Sin init(): buscar un email no necesita el admin por defecto, y la
+    # recuperación lo llama en el hilo de Tk mientras init_async puede estar en curso
+    _, by_email = _directory()
+    return by_email.get(email)
 
 
 def set_password_for_username(username, new_password):
-    users = load_users()
-    if username not in users:
+    if username not in _directory()[0]:
         return False
-    users[username]["password"] = hasher.hash(new_password)
-    save_users(users)
+    hashed = _hash(new_password)
+    store = user_store.get_store()
+    with _lock:
+        stamps = store.update(username, {"password": hashed})
+        if stamps is None:
+            return False
+
+        def apply(users, by_email):
+            if username in users:
+                users[username]["password"] = hashed
+        _written(store, stamps, apply)
     logger.info("Contraseña actualizada para %s", username)
     return True
 
 
-# Inicializar admin por defecto cuando se importe el módulo
-create_default_admin()
+def _pool():
+    with _lock:
+        if _executor["pool"] is None:
+            _executor["pool"] = ThreadPoolExecutor(max_workers=config.AUTH_WORKERS,
+                                                   thread_name_prefix="auth")
+        return _executor["pool"]
+
+
+def authenticate_async(username, password):
+    """Como authenticate, pero en un hilo del pool; devuelve un Future con el bool.
+
+    Pensado para la interfaz: el hash tarda decenas de milisegundos y no debe
+    calcularse en el hilo de Tk.
+    """
+    return _pool().submit(authenticate, username, password)
+
+
+def add_user_async(username, password, email):
+    """Como add_user en el pool; el Future lleva la ValueError si la hay."""
+    return _pool().submit(add_user, username, password, email)
+
+
+def set_password_async(username, new_password):
+    return _pool().submit(set_password_for_username, username, new_password)
+
+
+def init_async():
+    """Lanza init() en el pool para no retrasar la primera ventana."""
+    return _pool().submit(init)
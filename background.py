@@ -0,0 +1,65 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LatestOnly:
+    """Ejecuta func(*args) en un hilo de fondo atendiendo solo la petición más reciente.
+
+    Si llegan varias peticiones mientras una está en curso, las intermedias se
+    descartan sin ejecutarse; y si la que está en curso queda superada, su
+    resultado no se entrega. done(result) y error(exc) se llaman desde el hilo
+    de fondo: la interfaz debe pasarlos a su hilo con after().
+    """
+
+    def __init__(self, func, done=None, error=None, name="LatestOnly"):
+        self.func = func
+        self.done = done
+        self.error = error
+        self.name = name
+        self._cond = threading.Condition()
+        self._pending = None
+        self._seq = 0
+        self._thread = None
+
+    def submit(self, *args):
+        with self._cond:
+            self._seq += 1
+            self._pending = args
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def cancel(self):
+        """Descarta lo pendiente y el resultado de lo que esté en curso."""
+        with self._cond:
+            self._seq += 1
+            self._pending = None
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._thread is not None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                args, seq = self._pending, self._seq
+                self._pending = None
+                if args is None:
+                    self._thread = None
+                    return
+            try:
+                result = self.func(*args)
+            except Exception as e:
+                logger.exception("Error en la tarea de fondo %s", self.name)
+                callback, result = self.error, e
+            else:
+                callback = self.done
+            # Solo se entrega si no llegó otra petición mientras tanto
+            if callback and seq == self._seq:
+                try:
+                    callback(result)
+                except Exception:
+                    logger.exception("Error entregando el resultado de %s", self.name)
@@ -0,0 +1,212 @@
+"""Micro-benchmarks de excel_db, búsqueda, auth y email_utils.
+
+Genera datos sintéticos deterministas (empleados en data.xlsx y usuarios en
+users.json) en un directorio temporal, mide cada operación y escribe los
+resultados en JSON. Con --baseline compara contra una ejecución anterior y
+termina con código 1 si alguna operación empeoró más que --tolerance.
+
+    python -m app.benchmark --sizes 1000,10000 --output bench.json
+    python -m app.benchmark --save-baseline            # guarda la referencia
+    python -m app.benchmark                            # compara contra ella
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from openpyxl import Workbook
+from app import config
+from app import excel_db
+from app import search_index
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+BASELINE_FILE = os.path.join(config.BASE_DIR, "benchmark_baseline.json")
+# Diferencias por debajo de este tiempo se consideran ruido al comparar
+MIN_DELTA = 0.001
+PASSWORD = "Bench#2024"
+
+_NOMBRES = ["José", "María", "Ángel", "Lucía", "Pedro", "Ana", "Raúl", "Inés", "Carlos", "Sofía"]
+_APELLIDOS = ["Pérez", "Gómez", "Núñez", "Díaz", "López", "Martínez", "Sánchez", "Rodríguez"]
+_CARGOS = ["Gerente", "Analista", "Técnico", "Contador", "Asistente", "Desarrollador"]
+
+
+def generate_employees(path, n, seed=0):
+    """Escribe un data.xlsx con n empleados; mismo seed, mismo contenido."""
+    rnd = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("empleados")
+    ws.append(excel_db.HEADERS)
+    for i in range(n):
+        ws.append([f"{rnd.choice(_NOMBRES)} {rnd.choice(_APELLIDOS)} {rnd.choice(_APELLIDOS)}",
+                   f"V-{10000000 + i}", rnd.choice(_CARGOS), str(rnd.randrange(300, 9000, 50))])
+    wb.save(path)
+
+
+def generate_users(path, n, password_hash):
+    """Escribe un users.json con n usuarios (user0..user{n-1}).
+
+    Todos comparten el mismo hash: calcular n hashes pbkdf2 llevaría minutos y
+    no cambia lo que se mide (cargar el archivo y verificar un hash).
+    """
+    users = {f"user{i}": {"password": password_hash, "email": f"user{i}@example.com"} for i in range(n)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=2, ensure_ascii=False)
+
+
+def measure(func, repeat, setup=None):
+    """Ejecuta func `repeat` veces y devuelve estadísticas en segundos."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "max": max(times), "runs": len(times)}
+
+
+def run_size(n, repeat, seed, workdir):
+    """Mide todas las operaciones con n empleados y n usuarios."""
+    from app import auth
+    from app import email_utils
+
+    config.DATA_EXCEL = os.path.join(workdir, f"data_{n}.xlsx")
+    config.DATA_SQLITE = os.path.join(workdir, f"data_{n}.db")
+    config.USERS_FILE = os.path.join(workdir, f"users_{n}.json")
+    config.USERS_DB = os.path.join(workdir, f"users_{n}.db")
+    generate_employees(config.DATA_EXCEL, n, seed)
+    generate_users(config.USERS_FILE, n, auth.hasher.hash(PASSWORD))
+    excel_db.invalidate_cache()
+    # Con el almacén SQLite la primera consulta migra users.json; no se mide
+    auth.list_users()
+
+    results = {}
+    results["read_all_cold"] = measure(excel_db.read_all, repeat, setup=excel_db.invalidate_cache)
+    results["read_all_warm"] = measure(excel_db.read_all, repeat)
+    results["iter_rows_page"] = measure(lambda: list(excel_db.iter_rows(n // 2, 50)), repeat)
+
+    counter = iter(range(10 ** 9))
+
+    def add():
+        excel_db.add_record({"Nombre": "Bench", "Cédula": f"B-{next(counter)}", "Cargo": "QA", "Salario": "1"})
+
+    results["add_record"] = measure(add, repeat)
+    results["get_record"] = measure(lambda: excel_db.get_record(f"V-{10000000 + n // 2}"), repeat)
+    results["update_by_key"] = measure(
+        lambda: excel_db.update_by_key(f"V-{10000000 + n // 2}", {"Nombre": "Editado", "Cédula": f"V-{10000000 + n // 2}",
+                                                                   "Cargo": "QA", "Salario": "2"}), repeat)
+    victims = iter(range(n))
+    results["delete_by_key"] = measure(lambda: excel_db.delete_by_key(f"V-{10000000 + next(victims)}"), repeat)
+    results["compact"] = measure(excel_db.compact, 1)
+
+    rows = excel_db.read_all()
+    index = search_index.SearchIndex()
+    results["search_index_build"] = measure(lambda: index.update(rows), 1)
+    results["search_selective"] = measure(lambda: index.search(f"{10000000 + n // 3}"), repeat)
+    results["search_broad"] = measure(lambda: index.search("tecnico"), repeat)
+    results["search_linear_scan"] = measure(
+        lambda: [r for r in rows if any("técnico" in ("" if v is None else str(v)).lower() for v in r)], repeat)
+
+    last = f"user{n - 1}"
+    results["authenticate"] = measure(lambda: auth.authenticate(last, PASSWORD), repeat)
+    results["get_username_by_email"] = measure(lambda: auth.get_username_by_email(f"{last}@example.com"), repeat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["send_code_dev"] = measure(lambda: email_utils.send_code(f"{last}@example.com"), repeat)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Lista de regresiones (tamaño, operación, antes, ahora) frente a la referencia."""
+    regressions = []
+    for size, ops in results.items():
+        for op, stats in ops.items():
+            before = baseline.get(size, {}).get(op)
+            if before is None:
+                continue
+            now, then = stats["median"], before["median"]
+            if now > then * (1 + tolerance) and now - then > MIN_DELTA:
+                regressions.append((size, op, then, now))
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Micro-benchmarks de la aplicación")
+    p.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                   help="Tamaños separados por comas (empleados y usuarios)")
+    p.add_argument("--repeat", type=int, default=3, help="Repeticiones por operación (se usa la mediana)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    p.add_argument("--baseline", default=BASELINE_FILE, help="Resultados de referencia para comparar")
+    p.add_argument("--save-baseline", action="store_true", help="Guardar estos resultados como referencia")
+    p.add_argument("--tolerance", type=float, default=0.25,
+                   help="Empeoramiento relativo admitido antes de fallar (0.25 = 25%%)")
+    args = p.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    saved = {name: getattr(config, name) for name in
+             ("BASE_DIR", "DATA_EXCEL", "DATA_SQLITE", "USERS_FILE", "USERS_DB", "SETTINGS_FILE", "SEARCH_INDEX_FILE", "SMTP_ENABLED",
+              "DATA_JOURNAL_MAX_ENTRIES", "DATA_JOURNAL_IDLE_SECONDS")}
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    # Todo lo que escriben los módulos (email.log, índice) queda en el directorio temporal;
+    # la compactación del journal solo se hace cuando se mide
+    config.BASE_DIR = workdir
+    config.SEARCH_INDEX_FILE = os.path.join(workdir, "search.idx")
+    config.SETTINGS_FILE = os.path.join(workdir, "settings.json")
+    config.SMTP_ENABLED = False
+    config.DATA_JOURNAL_MAX_ENTRIES = 10 ** 9
+    config.DATA_JOURNAL_IDLE_SECONDS = 10 ** 6
+    config.USERS_FILE = os.path.join(workdir, "users.json")
+    config.USERS_DB = os.path.join(workdir, "users.db")
+    # auth y email_utils configuran logging al importarse; se importan ya con las rutas temporales
+    from app import auth, email_utils  # noqa: F401
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    try:
+        for n in sizes:
+            print(f"Midiendo con {n} filas...", flush=True)
+            results[str(n)] = run_size(n, args.repeat, args.seed, workdir)
+            for op, stats in results[str(n)].items():
+                print(f"  {op:<24} {stats['median'] * 1000:10.2f} ms")
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+        excel_db.invalidate_cache()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"meta": {"python": sys.version.split()[0], "platform": platform.platform(),
+                       "seed": args.seed, "repeat": args.repeat},
+              "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Referencia guardada en {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        # Sin referencia no se puede detectar ninguna regresión: no cuenta como éxito
+        print(f"Sin referencia para comparar en {args.baseline} (genérala con --save-baseline)")
+        return 2
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.tolerance)
+    for size, op, then, now in regressions:
+        print(f"REGRESIÓN {op} ({size} filas): {then * 1000:.2f} ms -> {now * 1000:.2f} ms")
+    if regressions:
+        return 1
+    print("Sin regresiones respecto a la referencia")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
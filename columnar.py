@@ -0,0 +1,105 @@
+import threading
+from app import excel_db
+
+try:
+    # Motor opcional: si pandas/numpy no están instalados se sigue usando el
+    # filtrado fila a fila de la interfaz.
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
+except Exception:
+    np = None
+    pd = None
+
+_lock = threading.Lock()
+_frame_cache = {"key": None, "frame": None}
+
+# Separador que no aparece en los datos para unir las columnas de búsqueda
+_SEP = "\x1f"
+
+
+def available():
+    return pd is not None
+
+
+class EmployeeFrame:
+    """Vista columnar de la tabla de empleados.
+
+    Nombre/Cédula son columnas de texto, Cargo es categórica y Salario un
+    float64 (NaN si no es numérico). El índice del DataFrame es la posición
+    original de cada fila, de modo que los resultados siguen pudiendo mapearse
+    a las funciones posicionales de excel_db.
+    """
+
+    def __init__(self, rows, _df=None):
+        if pd is None:
+            raise ImportError("El motor columnar requiere pandas y numpy")
+        self._rows = rows
+        if _df is None:
+            _df = self._build(rows)
+        self.df = _df
+
+    @staticmethod
+    def _build(rows):
+        def column(i):
+            return ["" if r[i] is None else str(r[i]) for r in rows]
+
+        nombre, cedula, cargo, salario = (column(i) for i in range(len(excel_db.HEADERS)))
+        df = pd.DataFrame({
+            "Nombre": pd.Series(nombre, dtype="string"),
+            "Cédula": pd.Series(cedula, dtype="string"),
+            "Cargo": pd.Series(cargo, dtype="category"),
+            "Salario": pd.to_numeric(pd.Series(salario, dtype="string"), errors="coerce").astype("float64"),
+        })
+        # Texto en minúsculas de toda la fila, para búsquedas de subcadena vectorizadas
+        df["_texto"] = (df["Nombre"] + _SEP + df["Cédula"] + _SEP + df["Cargo"].astype("string")
+                        + _SEP + pd.Series(salario, dtype="string")).str.lower()
+        return df
+
+    def _derive(self, df):
+        return EmployeeFrame(self._rows, _df=df)
+
+    def __len__(self):
+        return len(self.df)
+
+    def filter(self, text=None, cargo=None, salary_min=None, salary_max=None):
+        """Filtra por subcadena (sin distinguir mayúsculas), cargo exacto y rango de salario."""
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+        if text:
+            mask &= df["_texto"].str.contains(text.lower(), regex=False).to_numpy(dtype=bool, na_value=False)
+        if cargo is not None:
+            mask &= (df["Cargo"] == cargo).to_numpy(dtype=bool, na_value=False)
+        salario = df["Salario"].to_numpy()
+        if salary_min is not None:
+            mask &= salario >= salary_min
+        if salary_max is not None:
+            mask &= salario <= salary_max
+        return self._derive(df[mask])
+
+    def sort(self, by="Nombre", ascending=True):
+        return self._derive(self.df.sort_values(by, ascending=ascending, kind="mergesort"))
+
+    def group_by(self, by="Cargo"):
+        """Agregados de Salario por grupo: count, sum, mean, min y max."""
+        return self.df.groupby(by, observed=True)["Salario"].agg(["count", "sum", "mean", "min", "max"])
+
+    def indexes(self):
+        return self.df.index.tolist()
+
+    def items(self):
+        """Pares (posición original, fila) en el orden actual de la vista."""
+        for i in self.df.index:
+            yield i, list(self._rows[i])
+
+    def rows(self):
+        return [row for _, row in self.items()]
+
+
+def get_frame():
+    """Devuelve el EmployeeFrame de la tabla actual, reconstruido solo si cambió."""
+    key = (excel_db.get_backend(), excel_db.data_stamp())
+    with _lock:
+        if _frame_cache["key"] != key:
+            _frame_cache["frame"] = EmployeeFrame(excel_db.read_all())
+            _frame_cache["key"] = key
+        return _frame_cache["frame"]
@@ -37,6 +37,44 @@ BASE_DIR = os.path.dirname(__file__)
 DATA_EXCEL = os.path.join(BASE_DIR, "data.xlsx")
 USERS_FILE = os.path.join(BASE_DIR, "users.json")
 
+# Almacén de usuarios: "sqlite" (users.db, cada cambio toca solo su fila) o
+# "json" (users.json completo en cada cambio). La primera vez que se abre
+# users.db se importan los usuarios de users.json, que queda como copia.
+USERS_BACKEND = os.getenv("USERS_BACKEND", "sqlite")
+USERS_DB = os.path.join(BASE_DIR, "users.db")
+# Hilos para verificar y calcular hashes de contraseñas fuera del hilo de la interfaz
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", "2"))
+
+# Coste del hash de contraseñas (pbkdf2_sha256). Las rondas se calibran en este
+# equipo para que verificar una contraseña tarde unos PASSWORD_HASH_TARGET_MS y
+# se guardan en SETTINGS_FILE; `python -m app.passwords calibrate` recalibra.
+# PASSWORD_ROUNDS fija las rondas a mano (0 = usar la calibración).
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "50"))
+PASSWORD_ROUNDS = int(os.getenv("PASSWORD_ROUNDS", "0"))
+SETTINGS_FILE = os.path.join(BASE_DIR, "settings.json")
+
+# Motor de almacenamiento de empleados: "excel" (data.xlsx) o "sqlite" (data.db).
+# Con "sqlite" el Excel se importa la primera vez y se puede volver a generar con
+# `python -m app.excel_db export` para RR. HH.
+DATA_BACKEND = os.getenv("DATA_BACKEND", "excel")
+DATA_SQLITE = os.path.join(BASE_DIR, "data.db")
+
+# Journal de escrituras de empleados (data.xlsx.journal): cada cambio se anexa al
+# journal y se integra en el Excel en segundo plano al superar
+# DATA_JOURNAL_MAX_ENTRIES entradas o tras DATA_JOURNAL_IDLE_SECONDS sin escrituras.
+DATA_JOURNAL_ENABLED = os.getenv("DATA_JOURNAL_ENABLED", "True") == "True"
+DATA_JOURNAL_MAX_ENTRIES = int(os.getenv("DATA_JOURNAL_MAX_ENTRIES", "200"))
+DATA_JOURNAL_IDLE_SECONDS = float(os.getenv("DATA_JOURNAL_IDLE_SECONDS", "30"))
+
+# Índice del buscador (trigramas y palabras); se regenera solo si falta o es de otra versión
+SEARCH_INDEX_FILE = os.path.join(BASE_DIR, "search.idx")
+
+# Métricas de rendimiento (contadores, tiempos e histogramas; ver app/metrics.py).
+# Desactivadas no cuestan nada; activadas se vuelcan en METRICS_FILE al salir
+# (JSON, o formato de texto de Prometheus si la extensión es .prom).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False") == "True"
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join(BASE_DIR, "metrics.json"))
+
 # Nota: para exportar variables de entorno en PowerShell:
 # $Env:SMTP_ENABLED = "True"
 # $Env:SMTP_HOST = "smtp.gmail.com"
@@ -1,43 +1,151 @@
 import argparse
+import csv
 import getpass
 import json
 import os
-from passlib.hash import bcrypt
-from app import config
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app import passwords
+from app import user_store
 
+# Columnas aceptadas en el archivo de alta masiva (CSV con cabecera o JSON Lines)
+FIELDS = {
+    "username": ("username", "usuario"),
+    "email": ("email", "correo"),
+    "password": ("password", "contraseña"),
+}
 
-def load_users():
-    if not os.path.exists(config.USERS_FILE):
-        return {}
-    with open(config.USERS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
 
+def _normalize(record):
+    lowered = {str(k).strip().lower(): v for k, v in record.items() if k is not None}
+    out = {}
+    for field, aliases in FIELDS.items():
+        value = next((lowered[a] for a in aliases if a in lowered), None)
+        out[field] = "" if value is None else str(value)
+    out["username"] = out["username"].strip()
+    out["email"] = out["email"].strip()
+    return out
 
-def save_users(users):
-    with open(config.USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(users, f, indent=2, ensure_ascii=False)
+
+def read_users(path):
+    """Devuelve [(línea, {"username", "email", "password"})] y la lista de errores de formato."""
+    entries, errors = [], []
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    errors.append(f"línea {n}: JSON inválido")
+                    continue
+                if not isinstance(record, dict):
+                    errors.append(f"línea {n}: se esperaba un objeto JSON")
+                    continue
+                entries.append((n, _normalize(record)))
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                entries.append((reader.line_num, _normalize(record)))
+    return entries, errors
+
+
+def validate(entries, existing):
+    """Comprueba todo antes de calcular ningún hash; devuelve la lista de errores."""
+    # auth se importa aquí y no arriba: los procesos del pool importan este
+    # módulo y solo necesitan app.passwords
+    from app.auth import EMAIL_RE
+    errors = []
+    taken_users = set(existing)
+    taken_emails = {info.get("email") for info in existing.values()}
+    seen_users, seen_emails = {}, {}
+    for n, user in entries:
+        username, email = user["username"], user["email"]
+        if not username:
+            errors.append(f"línea {n}: usuario vacío")
+        elif username in taken_users:
+            errors.append(f"línea {n}: el usuario {username} ya existe")
+        elif username in seen_users:
+            errors.append(f"línea {n}: usuario {username} repetido (línea {seen_users[username]})")
+        if not EMAIL_RE.match(email):
+            errors.append(f"línea {n}: email inválido {email!r}")
+        elif email in taken_emails:
+            errors.append(f"línea {n}: el email {email} ya está en uso")
+        elif email in seen_emails:
+            errors.append(f"línea {n}: email {email} repetido (línea {seen_emails[email]})")
+        if not user["password"]:
+            errors.append(f"línea {n}: contraseña vacía")
+        seen_users.setdefault(username, n)
+        seen_emails.setdefault(email, n)
+    return errors
+
+
+def hash_all(plain, workers=None):
+    """Calcula los hashes en paralelo con un proceso por núcleo (mismo esquema que auth)."""
+    workers = workers or os.cpu_count() or 1
+    # Calibrar (si hace falta) aquí y no en cada proceso del pool
+    passwords.configured_rounds()
+    if workers == 1 or len(plain) < 2:
+        return [passwords.hash_password(p) for p in plain]
+    chunksize = max(1, len(plain) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(passwords.hash_password, plain, chunksize=chunksize))
+
+
+def bulk_create(path, workers=None):
+    """Alta masiva: valida, calcula los hashes y guarda todo en una única escritura.
+
+    Devuelve el número de usuarios creados; ValueError con todos los problemas
+    encontrados si el archivo no es válido (en ese caso no se guarda nada).
+    """
+    entries, errors = read_users(path)
+    store = user_store.get_store()
+    errors += validate(entries, store.load())
+    if errors:
+        raise ValueError("\n".join(errors))
+    hashes = hash_all([user["password"] for _, user in entries], workers)
+    store.add_many({user["username"]: {"password": hashed, "email": user["email"]}
+                    for (_, user), hashed in zip(entries, hashes)})
+    return len(entries)
 
 
 def main():
-    p = argparse.ArgumentParser(description="Crear o actualizar usuario para la aplicación")
-    p.add_argument("username", help="Nombre de usuario")
-    p.add_argument("email", help="Correo electrónico del usuario")
+    p = argparse.ArgumentParser(description="Crear o actualizar usuarios para la aplicación")
+    p.add_argument("username", nargs="?", help="Nombre de usuario")
+    p.add_argument("email", nargs="?", help="Correo electrónico del usuario")
     p.add_argument("--password", help="Contraseña (si no se provee se pedirá) ")
+    p.add_argument("--bulk", metavar="ARCHIVO",
+                   help="Alta masiva desde CSV o JSON Lines con columnas usuario/username, correo/email y contraseña/password")
+    p.add_argument("--workers", type=int, help="Procesos para calcular los hashes (por defecto, uno por núcleo)")
     args = p.parse_args()
 
+    if args.bulk:
+        start = time.perf_counter()
+        try:
+            count = bulk_create(args.bulk, args.workers)
+        except ValueError as e:
+            print(f"No se creó ningún usuario:\n{e}")
+            return 1
+        print(f"{count} usuarios creados en {time.perf_counter() - start:.1f} s.")
+        return 0
+
+    if not args.username or not args.email:
+        p.error("indica usuario y correo, o --bulk ARCHIVO")
     pwd = args.password
     if not pwd:
         pwd = getpass.getpass("Contraseña: ")
         pwd_confirm = getpass.getpass("Confirmar contraseña: ")
         if pwd != pwd_confirm:
             print("Las contraseñas no coinciden.")
-            return
+            return 1
 
-    users = load_users()
-    users[args.username] = {"password": bcrypt.hash(pwd), "email": args.email}
-    save_users(users)
+    user_store.get_store().put(args.username, {"password": passwords.hash_password(pwd), "email": args.email})
     print(f"Usuario '{args.username}' creado/actualizado con email {args.email}.")
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
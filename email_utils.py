@@ -4,6 +4,7 @@ import smtplib
 from email.message import EmailMessage
 from datetime import datetime, timedelta
 from app import config
+from app import metrics
 import logging
 
 # Código temporal almacenado en memoria (email -> {code, ts, sent})
@@ -45,6 +46,7 @@ def log_event(event_type: str, email_address: str = None, message: str = None):
         logger.exception("No se pudo escribir evento en email.log")
 
 
+@metrics.timed("email.send_code")
 def send_code(email_address):
     """Genera y envía un código. Devuelve (code, sent_bool)."""
     code = generate_code()
@@ -91,16 +93,22 @@ def send_code(email_address):
             try:
                 # Use configured timeout to avoid blocking the main thread indefinitely
                 timeout = getattr(config, 'SMTP_TIMEOUT', 10)
-                with smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT, timeout=timeout) as server:
+                with metrics.timer("email.smtp_connect"):
+                    server = smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT, timeout=timeout)
+                with server:
                     if getattr(config, 'SMTP_DEBUG', False):
                         server.set_debuglevel(1)
-                    server.starttls()
-                    server.login(config.SMTP_USER, config.SMTP_PASSWORD)
-                    server.send_message(msg)
+                    with metrics.timer("email.smtp_login"):
+                        server.starttls()
+                        server.login(config.SMTP_USER, config.SMTP_PASSWORD)
+                    with metrics.timer("email.smtp_send"):
+                        server.send_message(msg)
                 sent = True
+                metrics.inc("email.sent")
                 print(f"Código enviado por SMTP a {email_address} (From: {config.FROM_ADDRESS}, Subj: {subject}, attempt={attempts})")
             except Exception as e:
                 last_exception = e
+                metrics.inc("email.send_errors")
                 print(f"Error enviando SMTP (attempt {attempts}):", e)
                 try:
                     import traceback
@@ -1,50 +1,966 @@
-import os
-from openpyxl import Workbook, load_workbook
-from app import config
-
-HEADERS = ["Nombre", "Cédula", "Cargo", "Salario"]
-
-
-def ensure_file():
-    if not os.path.exists(config.DATA_EXCEL):
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "empleados"
-        ws.append(HEADERS)
-        wb.save(config.DATA_EXCEL)
-
-
-def read_all():
-    ensure_file()
-    wb = load_workbook(config.DATA_EXCEL)
-    ws = wb["empleados"]
-    rows = []
-    for i, row in enumerate(ws.iter_rows(values_only=True), start=1):
-        if i == 1:
-            continue
-        rows.append(list(row))
-    return rows
-
-
-def add_record(record):
-    ensure_file()
-    wb = load_workbook(config.DATA_EXCEL)
-    ws = wb["empleados"]
-    ws.append([record.get(h, "") for h in HEADERS])
-    wb.save(config.DATA_EXCEL)
-
-
-def delete_record(row_index):
-    wb = load_workbook(config.DATA_EXCEL)
-    ws = wb["empleados"]
-    ws.delete_rows(row_index + 2)
-    wb.save(config.DATA_EXCEL)
-
-
-def update_record(row_index, record):
-    wb = load_workbook(config.DATA_EXCEL)
-    ws = wb["empleados"]
-    r = row_index + 2
-    for c, h in enumerate(HEADERS, start=1):
-        ws.cell(row=r, column=c, value=record.get(h, ""))
-    wb.save(config.DATA_EXCEL)
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+from openpyxl import Workbook, load_workbook
+from openpyxl.packaging.custom import IntProperty
+from app import config
+from app import filelock
+from app import fileutil
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+HEADERS = ["Nombre", "Cédula", "Cargo", "Salario"]
+# Campo que identifica de forma estable a cada empleado
+KEY_FIELD = "Cédula"
+_KEY_COL = HEADERS.index(KEY_FIELD)
+
+# Propiedad del libro con el último número de secuencia del journal ya integrado
+SEQ_PROPERTY = "journal_seq"
+
+# Tabla de empleados cacheada en memoria para todo el proceso. Se carga una
+# sola vez y solo se vuelve a leer del disco si el archivo o su journal cambian
+# (mtime/tamaño) fuera de este proceso.
+_lock = threading.RLock()
+_cache = {"path": None, "stamp": None, "rows": None, "index": None, "seq": 0, "pending": 0}
+# Estado de excel_db.batch(): profundidad de anidamiento y cambios pendientes
+_batch = {"depth": 0, "entries": []}
+# Compactación programada y las que se están ejecutando en segundo plano
+_compactor = {"timer": None, "running": set(), "closing": False}
+# Entradas aplicadas a la caché desde su última recarga completa, como pares
+# (seq, entrada); base es el seq a partir del cual el registro está completo
+# (None: no hay registro). Ver changes_since().
+_changes = {"base": None, "entries": []}
+_CHANGES_MAX = 10000
+# Anidamiento del bloqueo de escritura entre procesos (ver _write_lock)
+_write_depth = {"depth": 0}
+
+
+class ConflictError(Exception):
+    """La versión de los datos cambió desde que el llamador la leyó.
+
+    Se lanza cuando expected_version no coincide con data_version(); basta con
+    volver a leer y reintentar.
+    """
+
+    def __init__(self, expected, actual):
+        super().__init__(f"Los datos cambiaron (versión esperada {expected}, actual {actual})")
+        self.expected = expected
+        self.actual = actual
+
+
+def _journal_path():
+    return config.DATA_EXCEL + ".journal"
+
+
+def _lock_path():
+    return config.DATA_EXCEL + ".lock"
+
+
+@contextmanager
+def _write_lock():
+    """Bloqueo del hilo y del archivo para modificar datos de forma segura
+    entre varias instancias de la aplicación. Reentrante dentro del proceso."""
+    with _lock:
+        if _write_depth["depth"]:
+            _write_depth["depth"] += 1
+            try:
+                yield
+            finally:
+                _write_depth["depth"] -= 1
+            return
+        with filelock.locked(_lock_path()):
+            _write_depth["depth"] = 1
+            try:
+                yield
+            finally:
+                _write_depth["depth"] = 0
+
+
+def _xlsx_stamp():
+    """Huella (mtime/tamaño) del libro y su journal; cambia con cada escritura."""
+    return (fileutil.file_stamp(config.DATA_EXCEL), fileutil.file_stamp(_journal_path()))
+
+
+def _sheet_rows(wb, start=0, limit=None):
+    ws = wb["empleados"]
+    max_row = None if limit is None else start + limit + 1
+    for row in ws.iter_rows(min_row=start + 2, max_row=max_row, values_only=True):
+        values = list(row)
+        if len(values) < len(HEADERS):
+            values.extend([None] * (len(HEADERS) - len(values)))
+        yield values
+
+
+def _snapshot_seq(wb):
+    try:
+        return int(wb.custom_doc_props[SEQ_PROPERTY].value)
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def _stream_rows(start=0, limit=None, path=None):
+    """Lee filas del disco en modo solo-lectura, sin cargar toda la hoja."""
+    if limit is not None and limit <= 0:
+        return
+    with metrics.timer("excel_db.workbook_load"):
+        wb = load_workbook(path or config.DATA_EXCEL, read_only=True)
+    try:
+        yield from _sheet_rows(wb, start, limit)
+    finally:
+        # En modo read_only openpyxl mantiene el archivo abierto hasta close()
+        wb.close()
+
+
+@metrics.timed("excel_db.workbook_load")
+def _load_snapshot():
+    wb = load_workbook(config.DATA_EXCEL, read_only=True)
+    try:
+        return list(_sheet_rows(wb)), _snapshot_seq(wb)
+    finally:
+        wb.close()
+
+
+@metrics.timed("excel_db.journal_read")
+def _read_journal():
+    entries = []
+    try:
+        with open(_journal_path(), "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Última línea incompleta por un corte durante la escritura
+                    logger.warning("Entrada de journal inválida ignorada: %r", line[:80])
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def normalize_key(value):
+    """Normaliza una cédula para usarla como clave (None si está vacía)."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Excel guarda los números como float: 12345.0 -> "12345"
+        value = int(value)
+    key = str(value).strip()
+    return key or None
+
+
+def record_key(data):
+    """Clave estable de un registro (fila o dict): su Cédula normalizada, o None."""
+    if isinstance(data, dict):
+        return normalize_key(data.get(KEY_FIELD))
+    return normalize_key(data[_KEY_COL]) if len(data) > _KEY_COL else None
+
+
+def _build_index(rows):
+    index = {}
+    for row in rows:
+        _index_add(index, row)
+    return index
+
+
+def _index_add(index, row):
+    key = record_key(row)
+    if key is not None:
+        # Con cédulas duplicadas heredadas del Excel gana la primera fila
+        index.setdefault(key, row)
+
+
+def _index_remove(index, row):
+    key = record_key(row)
+    if key is not None and index.get(key) is row:
+        del index[key]
+
+
+def _set_values(index, pairs):
+    """Aplica [(fila, valores)]; primero se quitan todas las claves del índice para
+    que un intercambio de cédulas entre filas del mismo lote quede bien indexado."""
+    for row, _ in pairs:
+        _index_remove(index, row)
+    for row, values in pairs:
+        # Solo se reemplazan las columnas conocidas; se conservan columnas extra
+        row[:len(HEADERS)] = values
+    for row, _ in pairs:
+        _index_add(index, row)
+
+
+def _apply(rows, index, entry):
+    """Aplica una entrada del journal a la tabla y a su índice por cédula."""
+    op = entry["op"]
+    if op == "add":
+        for values in entry["rows"]:
+            row = list(values)
+            rows.append(row)
+            _index_add(index, row)
+    elif op == "update":
+        _set_values(index, [(rows[row_index], values) for row_index, values in entry["rows"]])
+    elif op == "update_key":
+        pairs = [(index.get(key), values) for key, values in entry["rows"]]
+        _set_values(index, [(row, values) for row, values in pairs if row is not None])
+    elif op == "delete":
+        # De mayor a menor para que cada borrado no desplace los siguientes
+        for row_index in sorted(set(entry["indexes"]), reverse=True):
+            _index_remove(index, rows[row_index])
+            del rows[row_index]
+    elif op == "delete_key":
+        doomed = {id(index.pop(key)) for key in entry["keys"] if key in index}
+        rows[:] = [row for row in rows if id(row) not in doomed]
+    else:
+        raise ValueError(f"Operación desconocida en el journal: {op}")
+
+
+def _column_indexes(columns):
+    if columns is None:
+        return None
+    return [HEADERS.index(c) if isinstance(c, str) else c for c in columns]
+
+
+def _is_fresh():
+    return (_cache["rows"] is not None and _cache["path"] == config.DATA_EXCEL
+            and _cache["stamp"] == _xlsx_stamp())
+
+
+def _cached_rows():
+    """Devuelve la lista cacheada (sin copiar); recarga si el archivo cambió.
+
+    La tabla es el último volcado del libro más las entradas del journal que
+    aún no se han integrado en él.
+    """
+    _ensure_xlsx()
+    if _is_fresh():
+        metrics.inc("excel_db.cache_hit")
+        return _cache["rows"]
+    stamp = _xlsx_stamp()
+    if (_cache["rows"] is not None and _cache["path"] == config.DATA_EXCEL
+            and _cache["stamp"][0] == stamp[0]):
+        # Solo creció el journal (escrituras de otra instancia): aplicar lo nuevo
+        metrics.inc("excel_db.cache_refresh")
+        for entry in _read_journal():
+            if entry.get("seq", 0) > _cache["seq"]:
+                _apply(_cache["rows"], _cache["index"], entry)
+                _cache["seq"] = entry["seq"]
+                _cache["pending"] += 1
+                _log_changes(entry["seq"], [entry])
+        _cache["stamp"] = stamp
+    else:
+        metrics.inc("excel_db.cache_miss")
+        rows, seq = _load_snapshot()
+        index = _build_index(rows)
+        pending = 0
+        for entry in _read_journal():
+            if entry.get("seq", 0) > seq:
+                _apply(rows, index, entry)
+                seq = entry["seq"]
+                pending += 1
+        _cache.update(path=config.DATA_EXCEL, stamp=stamp, rows=rows, index=index,
+                      seq=seq, pending=pending)
+        _changes.update(base=seq, entries=[])
+    return _cache["rows"]
+
+
+def _log_changes(last_seq, entries):
+    """Anota en _changes las entradas que acaban de quedar aplicadas (la última con last_seq)."""
+    if _changes["base"] is None:
+        return
+    log = _changes["entries"]
+    first = last_seq - len(entries) + 1
+    log.extend((first + i, entry) for i, entry in enumerate(entries))
+    if len(log) > _CHANGES_MAX:
+        del log[:-_CHANGES_MAX]
+        _changes["base"] = log[0][0] - 1
+
+
+def _xlsx_version():
+    with _lock:
+        _cached_rows()
+        return _cache["seq"]
+
+
+@metrics.timed("excel_db.workbook_load")
+def _disk_snapshot_seq():
+    wb = load_workbook(config.DATA_EXCEL, read_only=True)
+    try:
+        return _snapshot_seq(wb)
+    finally:
+        wb.close()
+
+
+def _invalidate_cache():
+    """Descarta la caché; la próxima lectura recargará el archivo."""
+    with _lock:
+        _cache["rows"] = None
+        _cache["stamp"] = None
+        _changes["base"] = None
+
+
+def _ensure_xlsx():
+    if not os.path.exists(config.DATA_EXCEL):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "empleados"
+        ws.append(HEADERS)
+        wb.save(config.DATA_EXCEL)
+
+
+def _xlsx_read_all():
+    with _lock:
+        return [list(row) for row in _cached_rows()]
+
+
+def _xlsx_changes_since(version):
+    with _lock:
+        rows = _cached_rows()
+        seq = _cache["seq"]
+        base = _changes["base"]
+        if version is not None and base is not None and base <= version <= seq:
+            return seq, [entry for s, entry in _changes["entries"] if s > version], None
+        return seq, None, [list(row) for row in rows]
+
+
+def _xlsx_iter_rows(start=0, limit=None, columns=None):
+    """Genera las filas de forma perezosa.
+
+    start/limit seleccionan un rango de registros (0 = primera fila de datos) y
+    columns restringe cada fila a las columnas indicadas (nombres de HEADERS o
+    índices). Si la caché está vigente se sirve desde memoria; si no, se lee el
+    archivo en modo streaming sin llenar la caché.
+    """
+    idx = _column_indexes(columns)
+    with _lock:
+        _ensure_xlsx()
+        if not _is_fresh() and os.path.exists(_journal_path()):
+            # Hay cambios sin integrar en el libro: hay que fusionarlos en memoria
+            _cached_rows()
+        fresh = _is_fresh()
+        if fresh:
+            end = None if limit is None else start + limit
+            source = _cache["rows"][start:end]
+    if not fresh:
+        source = _stream_rows(start, limit)
+    for row in source:
+        yield list(row) if idx is None else [row[i] for i in idx]
+
+
+def _write_snapshot(rows, seq):
+    """Genera un nuevo data.xlsx en un archivo temporal y devuelve su ruta.
+
+    Las celdas se sobrescriben en su sitio para conservar el formato de la hoja.
+    El temporal se instala con fileutil.replace(..., fsync=True): el libro debe
+    estar en disco antes de recortar el journal.
+    """
+    with metrics.timer("excel_db.workbook_load"):
+        wb = load_workbook(config.DATA_EXCEL)
+    ws = wb["empleados"]
+    width = ws.max_column
+    for r, values in enumerate(rows, start=2):
+        # Se recorren todas las columnas de la hoja: las que la fila no tiene se
+        # vacían para que no queden datos de la fila que antes ocupaba ese lugar
+        for c in range(1, max(width, len(values)) + 1):
+            # (ws.cell(..., value=None) no borra: hay que asignar .value)
+            ws.cell(row=r, column=c).value = values[c - 1] if c <= len(values) else None
+    extra = ws.max_row - (len(rows) + 1)
+    if extra > 0:
+        ws.delete_rows(len(rows) + 2, extra)
+    props = wb.custom_doc_props
+    if SEQ_PROPERTY in props.names:
+        del props[SEQ_PROPERTY]
+    props.append(IntProperty(name=SEQ_PROPERTY, value=seq))
+    tmp = fileutil.temp_path(config.DATA_EXCEL, ".xlsx")
+    try:
+        with metrics.timer("excel_db.workbook_save"):
+            wb.save(tmp)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return tmp
+
+
+def _trim_journal(seq):
+    """Quita del journal las entradas ya integradas (<= seq); devuelve las restantes."""
+    path = _journal_path()
+    remaining = [e for e in _read_journal() if e.get("seq", 0) > seq]
+    if not remaining:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return 0
+    with fileutil.atomic_write(path, fsync=True, encoding="utf-8") as f:
+        for entry in remaining:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    return len(remaining)
+
+
+def _save_snapshot(rows, seq):
+    # Reemplazo atómico: un corte a mitad de escritura nunca deja el libro a medias
+    tmp = _write_snapshot(rows, seq)
+    try:
+        fileutil.replace(tmp, config.DATA_EXCEL, fsync=True)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _cache["pending"] = _trim_journal(seq)
+    _cache["stamp"] = _xlsx_stamp()
+
+
+@metrics.timed("excel_db.journal_append")
+def _journal_append(entries):
+    metrics.observe("excel_db.journal_append_entries", len(entries))
+    seq = _cache["seq"]
+    lines = []
+    for entry in entries:
+        seq += 1
+        entry["seq"] = seq
+        lines.append(json.dumps(entry, ensure_ascii=False, default=str))
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+    with open(_journal_path(), "a+b") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # Cerrar una línea que quedó a medias para no corromper la nueva entrada
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    _cache["seq"] = seq
+    _cache["pending"] += len(entries)
+    _cache["stamp"] = _xlsx_stamp()
+    _schedule_compaction()
+
+
+def _flush(entries):
+    # Se llama siempre con _write_lock tomado: el seq es único entre instancias
+    try:
+        if config.DATA_JOURNAL_ENABLED:
+            _journal_append(entries)
+        else:
+            _cache["seq"] += len(entries)
+            _save_snapshot(_cache["rows"], _cache["seq"])
+    except Exception:
+        # La caché ya tiene el cambio aplicado; se descarta para no divergir del disco
+        _invalidate_cache()
+        raise
+    _log_changes(_cache["seq"], entries)
+
+
+def _commit(entry):
+    _apply(_cache["rows"], _cache["index"], entry)
+    if _batch["depth"]:
+        _batch["entries"].append(entry)
+    else:
+        _flush([entry])
+
+
+@metrics.timed("excel_db.compact")
+def _xlsx_compact():
+    """Integra el journal en data.xlsx. Devuelve True si había algo que integrar.
+
+    El libro se genera fuera del bloqueo; las escrituras que lleguen mientras
+    tanto quedan en el journal para la siguiente compactación.
+    """
+    with _lock:
+        rows = [list(row) for row in _cached_rows()]
+        seq = _cache["seq"]
+        if not _cache["pending"]:
+            return False
+    tmp = _write_snapshot(rows, seq)
+    try:
+        with _write_lock():
+            if _disk_snapshot_seq() >= seq:
+                # Otra instancia ya integró estas entradas (o más) mientras tanto
+                return False
+            # Recoger lo que otras instancias hayan anexado entretanto antes de
+            # dar la caché por sincronizada con el disco
+            _cached_rows()
+            fileutil.replace(tmp, config.DATA_EXCEL, fsync=True)
+            _cache["pending"] = _trim_journal(seq)
+            _cache["stamp"] = _xlsx_stamp()
+    finally:
+        # Si no llegó a sustituir al libro (descartado o error), no se deja el temporal
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    logger.info("Journal integrado en %s (seq=%s)", config.DATA_EXCEL, seq)
+    return True
+
+
+def _background_compact():
+    thread = threading.current_thread()
+    with _lock:
+        if _compactor["running"]:
+            # Un temporizador ya disparado puede coincidir con otra compactación:
+            # esa se reprogramará al terminar si queda algo pendiente
+            return
+        _compactor["running"].add(thread)
+    ok = False
+    try:
+        _xlsx_compact()
+        ok = True
+    except Exception:
+        logger.exception("Error integrando el journal en %s", config.DATA_EXCEL)
+    finally:
+        with _lock:
+            _compactor["running"].discard(thread)
+            # Las escrituras llegadas durante la compactación no programaron otra:
+            # si dejaron entradas pendientes, se programa ahora (tras un error no,
+            # para no reintentar en bucle; la próxima escritura lo hará)
+            if ok and _cache["pending"]:
+                _schedule_compaction()
+
+
+def _schedule_compaction():
+    # Se compacta de inmediato al superar el umbral, o tras un rato sin escrituras.
+    # Nunca hay más de una compactación a la vez: si ya hay una en marcha, ella
+    # misma se reprograma al terminar.
+    if _compactor["closing"] or _compactor["running"]:
+        return
+    delay = config.DATA_JOURNAL_IDLE_SECONDS
+    if _cache["pending"] >= config.DATA_JOURNAL_MAX_ENTRIES:
+        delay = 0
+    timer = _compactor["timer"]
+    if timer is not None:
+        timer.cancel()
+    timer = threading.Timer(delay, _background_compact)
+    timer.daemon = True
+    _compactor["timer"] = timer
+    timer.start()
+
+
+@atexit.register
+def _compact_at_exit():
+    _compactor["closing"] = True
+    timer = _compactor["timer"]
+    if timer is not None:
+        timer.cancel()
+        # Los hilos de compactación son daemon: si alguno ya empezó hay que
+        # esperarlo, o el intérprete lo cortaría dejando su tmp*.xlsx a medias
+        for thread in list(_compactor["running"]) + [timer]:
+            if thread is not threading.current_thread():
+                thread.join()
+        if _cache["pending"]:
+            _background_compact()
+
+
+@contextmanager
+def _xlsx_batch(expected_version=None):
+    """Agrupa varias modificaciones en una única escritura.
+
+        with excel_db.batch():
+            excel_db.add_record(...)
+            excel_db.delete_records([3, 7])
+
+    Si ocurre una excepción dentro del bloque no se guarda nada y la caché se
+    descarta para volver al contenido del archivo. El bloqueo de escritura se
+    mantiene durante todo el bloque.
+    """
+    with _write_lock():
+        _cached_rows()
+        if expected_version is not None and expected_version != _cache["seq"]:
+            raise ConflictError(expected_version, _cache["seq"])
+        _batch["depth"] += 1
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            _batch["depth"] -= 1
+            if _batch["depth"] == 0:
+                entries, _batch["entries"] = _batch["entries"], []
+                if not ok:
+                    _invalidate_cache()
+                elif entries:
+                    _flush(entries)
+
+
+def _check_index(rows, row_index):
+    if not 0 <= row_index < len(rows):
+        raise IndexError(f"Registro fuera de rango: {row_index}")
+
+
+def _check_key(index, key, updated=(), seen=()):
+    """Valida la cédula de un registro nuevo o modificado.
+
+    updated: ids de las filas que reescribe la operación (pueden ceder su
+    cédula); seen: cédulas ya asignadas dentro del mismo lote.
+    """
+    if key is None:
+        raise ValueError("La cédula no puede estar vacía")
+    existing = index.get(key)
+    if key in seen or (existing is not None and id(existing) not in updated):
+        raise ValueError(f"Ya existe un empleado con la cédula {key}")
+
+
+def _values(record):
+    return [record.get(h, "") for h in HEADERS]
+
+
+def _xlsx_add_records(records):
+    with _write_lock():
+        _cached_rows()
+        index = _cache["index"]
+        rows, seen = [], set()
+        for record in records:
+            key = record_key(record)
+            _check_key(index, key, seen=seen)
+            seen.add(key)
+            rows.append(_values(record))
+        _commit({"op": "add", "rows": rows})
+
+
+def _xlsx_update_records(updates):
+    if isinstance(updates, dict):
+        updates = updates.items()
+    with _write_lock():
+        rows = _cached_rows()
+        pending = {}
+        for row_index, record in updates:
+            _check_index(rows, row_index)
+            pending[row_index] = record
+        # Se valida contra las cédulas tal como quedarán tras todo el lote
+        updated = {id(rows[i]) for i in pending}
+        items, seen = [], set()
+        for row_index, record in pending.items():
+            key = record_key(record)
+            _check_key(_cache["index"], key, updated=updated, seen=seen)
+            seen.add(key)
+            items.append([row_index, _values(record)])
+        _commit({"op": "update", "rows": items})
+
+
+def _xlsx_delete_records(row_indexes):
+    with _write_lock():
+        rows = _cached_rows()
+        indexes = sorted(set(row_indexes))
+        for row_index in indexes:
+            _check_index(rows, row_index)
+        _commit({"op": "delete", "indexes": indexes})
+
+
+def _lookup(key):
+    row = _cache["index"].get(normalize_key(key))
+    if row is None:
+        raise KeyError(f"No existe un empleado con la cédula {key}")
+    return row
+
+
+def _xlsx_get_record(key):
+    with _lock:
+        _cached_rows()
+        row = _cache["index"].get(normalize_key(key))
+        return None if row is None else list(row)
+
+
+def _xlsx_update_by_key(key, record):
+    with _write_lock():
+        _cached_rows()
+        row = _lookup(key)
+        _check_key(_cache["index"], record_key(record), updated={id(row)})
+        _commit({"op": "update_key", "rows": [[record_key(row), _values(record)]]})
+
+
+def _xlsx_delete_by_keys(keys):
+    with _write_lock():
+        _cached_rows()
+        keys = [record_key(_lookup(key)) for key in keys]
+        _commit({"op": "delete_key", "keys": keys})
+
+
+class ExcelBackend:
+    """Motor por defecto: data.xlsx con caché en memoria y journal de escrituras."""
+    name = "excel"
+
+    def ensure_file(self):
+        _ensure_xlsx()
+
+    def data_stamp(self):
+        return _xlsx_stamp()
+
+    def data_files(self):
+        return [config.DATA_EXCEL, _journal_path()]
+
+    def invalidate_cache(self):
+        _invalidate_cache()
+
+    def compact(self):
+        return _xlsx_compact()
+
+    def read_all(self):
+        return _xlsx_read_all()
+
+    def iter_rows(self, start=0, limit=None, columns=None):
+        return _xlsx_iter_rows(start, limit, columns)
+
+    def data_version(self):
+        return _xlsx_version()
+
+    def changes_since(self, version):
+        return _xlsx_changes_since(version)
+
+    def batch(self, expected_version=None):
+        return _xlsx_batch(expected_version)
+
+    def add_records(self, records):
+        _xlsx_add_records(records)
+
+    def update_records(self, updates):
+        _xlsx_update_records(updates)
+
+    def delete_records(self, row_indexes):
+        _xlsx_delete_records(row_indexes)
+
+    def get_record(self, key):
+        return _xlsx_get_record(key)
+
+    def update_by_key(self, key, record):
+        _xlsx_update_by_key(key, record)
+
+    def delete_by_keys(self, keys):
+        _xlsx_delete_by_keys(keys)
+
+
+# Motores ya creados, por (nombre, ruta) para respetar cambios en config
+_backends = {}
+
+
+def get_backend():
+    """Devuelve el motor de almacenamiento elegido en config.DATA_BACKEND.
+
+    Todos los motores exponen ensure_file, data_stamp, data_files,
+    data_version, invalidate_cache, compact, read_all, iter_rows, batch, add_records,
+    update_records, delete_records, get_record, update_by_key y
+    delete_by_keys; las funciones de este módulo delegan en él.
+    """
+    name = config.DATA_BACKEND
+    path = config.DATA_SQLITE if name == "sqlite" else config.DATA_EXCEL
+    with _lock:
+        backend = _backends.get((name, path))
+        if backend is None:
+            if name == "excel":
+                backend = ExcelBackend()
+            elif name == "sqlite":
+                from app.sqlite_db import SQLiteBackend
+                backend = SQLiteBackend(path)
+            else:
+                raise ValueError(f"Motor de datos desconocido: {name}")
+            _backends[(name, path)] = backend
+    return backend
+
+
+def ensure_file():
+    get_backend().ensure_file()
+
+
+def data_stamp():
+    """Huella del almacenamiento; cambia con cada escritura (propia o externa)."""
+    return get_backend().data_stamp()
+
+
+def data_files():
+    """Archivos en disco cuyo cambio implica un cambio de datos (para vigilarlos)."""
+    return get_backend().data_files()
+
+
+def data_version():
+    """Versión de los datos: crece con cada modificación, de cualquier instancia.
+
+    Se puede pasar como expected_version a batch() y a las funciones de
+    modificación para que fallen con ConflictError si otro proceso escribió
+    entretanto (compare-and-set).
+    """
+    return get_backend().data_version()
+
+
+def changes_since(version):
+    """Cambios desde `version` (la devuelta por una llamada anterior), para
+    mantener estructuras derivadas sin recorrer toda la tabla.
+
+    Devuelve (versión, entradas, filas). Si se conocen los cambios (escrituras
+    de este proceso o entradas del journal de otras instancias), entradas es la
+    lista de entradas del journal ({"op": "add" | "update" | "update_key" |
+    "delete" | "delete_key", ...}) y filas es None. Si no (version None, una
+    recarga completa entremedias u otro motor), entradas es None y filas es una
+    copia de toda la tabla. Ambas cosas corresponden exactamente a la versión
+    devuelta.
+    """
+    backend = get_backend()
+    if hasattr(backend, "changes_since"):
+        return backend.changes_since(version)
+    return None, None, backend.read_all()
+
+
+def invalidate_cache():
+    """Descarta la caché; la próxima lectura recargará el archivo."""
+    get_backend().invalidate_cache()
+
+
+def compact():
+    """Integra los cambios pendientes en el almacenamiento principal."""
+    return get_backend().compact()
+
+
+@metrics.timed("excel_db.read_all")
+def read_all():
+    return get_backend().read_all()
+
+
+def iter_rows(start=0, limit=None, columns=None):
+    """Genera las filas de forma perezosa.
+
+    start/limit seleccionan un rango de registros (0 = primera fila de datos) y
+    columns restringe cada fila a las columnas indicadas (nombres de HEADERS o
+    índices).
+    """
+    return get_backend().iter_rows(start, limit, columns)
+
+
+def batch(expected_version=None):
+    """Agrupa varias modificaciones en una única escritura.
+
+        with excel_db.batch():
+            excel_db.add_record(...)
+            excel_db.delete_records([3, 7])
+
+    Si ocurre una excepción dentro del bloque no se guarda nada. Con
+    expected_version se lanza ConflictError al entrar si la versión cambió.
+    """
+    return get_backend().batch(expected_version)
+
+
+def _guarded(expected_version):
+    return nullcontext() if expected_version is None else batch(expected_version)
+
+
+@metrics.timed("excel_db.add_records")
+def add_records(records, expected_version=None):
+    """Añade registros; ValueError si alguna cédula está vacía o ya existe."""
+    with _guarded(expected_version):
+        get_backend().add_records(records)
+
+
+@metrics.timed("excel_db.update_records")
+def update_records(updates, expected_version=None):
+    """updates: dict {row_index: record} o iterable de pares (row_index, record)."""
+    with _guarded(expected_version):
+        get_backend().update_records(updates)
+
+
+@metrics.timed("excel_db.delete_records")
+def delete_records(row_indexes, expected_version=None):
+    """Elimina varios registros; los índices se refieren a la tabla antes de borrar."""
+    with _guarded(expected_version):
+        get_backend().delete_records(row_indexes)
+
+
+@metrics.timed("excel_db.get_record")
+def get_record(key):
+    """Devuelve la fila del empleado con esa cédula, o None. O(1) por índice hash."""
+    return get_backend().get_record(key)
+
+
+@metrics.timed("excel_db.update_by_key")
+def update_by_key(key, record, expected_version=None):
+    """Actualiza el empleado con esa cédula; KeyError si no existe.
+
+    Si el registro trae otra cédula, el empleado cambia de clave (ValueError si
+    ya está en uso).
+    """
+    with _guarded(expected_version):
+        get_backend().update_by_key(key, record)
+
+
+def delete_by_key(key, expected_version=None):
+    delete_by_keys([key], expected_version)
+
+
+@metrics.timed("excel_db.delete_by_keys")
+def delete_by_keys(keys, expected_version=None):
+    """Elimina los empleados con esas cédulas; KeyError si alguna no existe."""
+    with _guarded(expected_version):
+        get_backend().delete_by_keys(keys)
+
+
+def add_record(record, expected_version=None):
+    add_records([record], expected_version)
+
+
+def delete_record(row_index, expected_version=None):
+    delete_records([row_index], expected_version)
+
+
+def update_record(row_index, record, expected_version=None):
+    update_records([(row_index, record)], expected_version)
+
+
+def import_xlsx(path=None, backend=None):
+    """Reemplaza el contenido del motor con las filas de un libro Excel.
+
+    Por defecto lee config.DATA_EXCEL; sirve para volcar en SQLite los cambios
+    que RR. HH. haya hecho directamente en la hoja.
+    """
+    backend = backend or get_backend()
+    path = path or config.DATA_EXCEL
+    if isinstance(backend, ExcelBackend) and os.path.abspath(path) == os.path.abspath(config.DATA_EXCEL):
+        backend.invalidate_cache()
+        return
+    if os.path.abspath(path) == os.path.abspath(config.DATA_EXCEL):
+        # Incluir también los cambios del journal que aún no están en el libro
+        source = _xlsx_read_all()
+    else:
+        source = _stream_rows(path=path)
+    if hasattr(backend, "import_rows"):
+        # Datos heredados: una sola transacción y sin rechazar cédulas vacías o repetidas
+        source = list(source)
+        backend.import_rows(source)
+        logger.info("Importados %s registros desde %s", len(source), path)
+        return
+    records = [dict(zip(HEADERS, row)) for row in source]
+    with backend.batch():
+        backend.delete_records(range(len(backend.read_all())))
+        backend.add_records(records)
+    logger.info("Importados %s registros desde %s", len(records), path)
+
+
+def export_xlsx(path=None, backend=None):
+    """Escribe las filas del motor en un libro Excel (por defecto config.DATA_EXCEL)."""
+    backend = backend or get_backend()
+    path = path or config.DATA_EXCEL
+    if isinstance(backend, ExcelBackend) and os.path.abspath(path) == os.path.abspath(config.DATA_EXCEL):
+        backend.compact()
+        return
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("empleados")
+    ws.append(HEADERS)
+    count = 0
+    for row in backend.iter_rows():
+        ws.append(row)
+        count += 1
+    with fileutil.atomic_path(path, ".xlsx") as tmp, metrics.timer("excel_db.workbook_save"):
+        wb.save(tmp)
+    if os.path.abspath(path) == os.path.abspath(config.DATA_EXCEL):
+        # El libro nuevo sustituye por completo a cualquier journal anterior
+        with _write_lock():
+            _trim_journal(sys.maxsize)
+            _invalidate_cache()
+    logger.info("Exportados %s registros a %s", count, path)
+
+
+if __name__ == '__main__':
+    import argparse
+    p = argparse.ArgumentParser(description="Importar/exportar empleados entre el motor configurado y Excel")
+    p.add_argument("accion", choices=["import", "export"], help="import: Excel -> motor; export: motor -> Excel")
+    p.add_argument("ruta", nargs="?", help="Libro Excel (por defecto config.DATA_EXCEL)")
+    args = p.parse_args()
+    if args.accion == "import":
+        import_xlsx(args.ruta)
+    else:
+        export_xlsx(args.ruta)
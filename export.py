@@ -0,0 +1,97 @@
+import csv
+import gzip
+import json
+import logging
+import threading
+from app import excel_db
+from app import fileutil
+
+logger = logging.getLogger(__name__)
+
+# Formatos soportados y su extensión
+FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "jsonl": ".jsonl"}
+CHUNK_SIZE = 1000
+
+
+def format_for_path(path):
+    """Deduce el formato a partir de la extensión (csv por defecto)."""
+    lower = path.lower()
+    for fmt, ext in sorted(FORMATS.items(), key=lambda item: -len(item[1])):
+        if lower.endswith(ext):
+            return fmt
+    return "csv"
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _open(tmp, fmt):
+    if fmt == "csv.gz":
+        return gzip.open(tmp, "wt", encoding="utf-8", newline="")
+    return open(tmp, "w", encoding="utf-8", newline="")
+
+
+def export_rows(path, fmt=None, rows=None, total=None, progress=None, chunk_size=CHUNK_SIZE):
+    """Exporta filas en streaming a `path` y devuelve cuántas se escribieron.
+
+    rows es un iterable de filas (por defecto toda la tabla vía excel_db.iter_rows)
+    y progress(done, total) se llama tras cada bloque de chunk_size filas. Se
+    escribe en un temporal junto al destino y se renombra al terminar, de modo
+    que nunca queda un archivo a medias.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+    if rows is None:
+        rows = excel_db.iter_rows()
+    done = 0
+    with fileutil.atomic_path(path) as tmp:
+        with _open(tmp, fmt) as f:
+            writer = None
+            if fmt != "jsonl":
+                writer = csv.writer(f)
+                writer.writerow(excel_db.HEADERS)
+            for chunk in _chunks(rows, chunk_size):
+                if writer is not None:
+                    writer.writerows([("" if v is None else v) for v in row] for row in chunk)
+                else:
+                    f.writelines(json.dumps(dict(zip(excel_db.HEADERS, row)), ensure_ascii=False, default=str) + "\n"
+                                 for row in chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done, total)
+    logger.info("Exportadas %s filas a %s (%s)", done, path, fmt)
+    return done
+
+
+def start_export(path, fmt=None, rows=None, total=None, progress=None, done=None, error=None):
+    """Lanza export_rows en un hilo de fondo.
+
+    rows puede ser un callable que devuelva el iterable, para que también el
+    filtrado se haga fuera del hilo de la interfaz. done(count) o error(exc) se
+    llaman desde el hilo de fondo al terminar.
+    """
+    def worker():
+        try:
+            source = rows() if callable(rows) else rows
+            count_hint = len(source) if total is None and isinstance(source, list) else total
+            count = export_rows(path, fmt, source, count_hint, progress)
+        except Exception as e:
+            logger.exception("Error exportando a %s", path)
+            if error:
+                error(e)
+            return
+        if done:
+            done(count)
+
+    t = threading.Thread(target=worker, daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,40 @@
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no hay fcntl, se usa msvcrt.locking sobre el primer byte
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def locked(path, poll=0.05):
+    """Bloqueo exclusivo consultivo entre procesos sobre el archivo `path`.
+
+    El archivo de bloqueo se crea si no existe y nunca se borra. Bloquea hasta
+    obtener el cerrojo; no es reentrante.
+    """
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(poll)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
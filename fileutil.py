@@ -0,0 +1,82 @@
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+# os.umask solo se puede consultar cambiándolo: se lee una vez al importar
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_stamp(path):
+    """Huella (mtime, tamaño) de path, o None si no existe; cambia con cada escritura."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def fsync_dir(path):
+    """Lleva a disco la entrada de directorio de path (tras os.replace); en Windows no aplica."""
+    if os.name == "nt":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def temp_path(path, suffix=".tmp"):
+    """Crea un archivo temporal vacío junto a path (mismo sistema de archivos) y devuelve su ruta."""
+    fd, tmp = tempfile.mkstemp(suffix=suffix, dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    return tmp
+
+
+def replace(tmp, path, fsync=False):
+    """Sustituye path por el temporal tmp de forma atómica.
+
+    mkstemp crea los temporales con permisos 0600: el resultado toma los del
+    archivo que reemplaza o, si es nuevo, los por defecto según la umask. Con
+    fsync=True el contenido y el directorio se llevan a disco.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(tmp, mode)
+    if fsync:
+        with open(tmp, "r+b") as f:
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if fsync:
+        fsync_dir(path)
+
+
+@contextmanager
+def atomic_path(path, suffix=".tmp", fsync=False):
+    """Ruta temporal que sustituye a path al terminar el bloque sin errores.
+
+        with fileutil.atomic_path(path, ".xlsx") as tmp:
+            wb.save(tmp)
+
+    Si el bloque falla se borra el temporal y path queda intacto.
+    """
+    tmp = temp_path(path, suffix)
+    try:
+        yield tmp
+        replace(tmp, path, fsync)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@contextmanager
+def atomic_write(path, mode="w", fsync=False, **kwargs):
+    """Como atomic_path, pero entrega el temporal ya abierto con open(tmp, mode, **kwargs)."""
+    with atomic_path(path, fsync=fsync) as tmp:
+        with open(tmp, mode, **kwargs) as f:
+            yield f
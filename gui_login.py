@@ -4,7 +4,7 @@ from tkinter import font as tkfont
 from app import auth
 from app.gui_recovery import RecoveryWindow
 from app.gui_main import MainApp
-from app.widgets import NeuButton
+from app.widgets import NeuButton, Spinner, when_done
 from app.gui_register import RegisterWindow
 
 class LoginWindow(tk.Tk):
@@ -66,12 +66,17 @@ class LoginWindow(tk.Tk):
         frame.grid_columnconfigure(2, weight=1)
 
         # Botones centrados (columna 1)
-        login_btn = NeuButton(frame, text="Iniciar sesión", command=self.on_login, height=48, bg='#F8E3A9', fg=self.cget('bg'), border=0)
-        login_btn.grid(row=6, column=1, pady=(18,14))
+        self.login_btn = NeuButton(frame, text="Iniciar sesión", command=self.on_login, height=48, bg='#F8E3A9', fg=self.cget('bg'), border=0)
+        self.login_btn.grid(row=6, column=1, pady=(18,14))
 
         register_btn = NeuButton(frame, text="Regístrate", command=self.on_signup, height=44, bg='#F8E3A9', fg=self.cget('bg'), border=0)
         register_btn.grid(row=7, column=1, pady=(6,10))
 
+        # Busy indicator while the password is verified off the Tk thread
+        self.spinner = Spinner(frame, fg='#dcdcdc', font=("Arial", 11))
+        self.spinner.grid(row=8, column=1)
+        self._login_pending = False
+
         # Etiqueta clicable para recuperar contraseña (centrada al final) — estilo link claro
         self.recovery_label = tk.Label(frame, text="¿Olvidaste tu correo? Recuperar aquí", fg='#bcd1ff', bg='#2b2b33', cursor='hand2', font=("Arial", 11, 'underline'))
         self.recovery_label.grid(row=9, column=1, pady=(18,8))
@@ -131,7 +136,27 @@ class LoginWindow(tk.Tk):
             # indicate error on both fields
             self._indicate_error(['user','pw'])
             return
-        if auth.authenticate(u, p):
+        if self._login_pending:
+            return  # a verification is already running
+        self._set_busy(True)
+        when_done(self, auth.authenticate_async(u, p), lambda f: self._login_done(u, f))
+
+    def _set_busy(self, busy):
+        self._login_pending = busy
+        self.login_btn.set_state('disabled' if busy else 'normal')
+        self.config(cursor='watch' if busy else '')
+        if busy:
+            self.spinner.start('Verificando...')
+        else:
+            self.spinner.stop()
+
+    def _login_done(self, u, future):
+        self._set_busy(False)
+        try:
+            ok = future.result()
+        except Exception:
+            ok = False
+        if ok:
             messagebox.showinfo('Bienvenido', f'Bienvenido {u}')
             self.destroy()
             app = MainApp(u)
@@ -159,33 +184,23 @@ class LoginWindow(tk.Tk):
         # after 1.2s restore borders
         self.after(1200, lambda: [self._clear_error(f) for f in fields])
 
-    def _shake_fields(self, fields, magnitude=6, cycles=8, delay=30):
+    def _shake_fields(self, fields, magnitude=6, cycles=8, delay=30, step=0):
+        # Adjust grid padding to simulate shake, one step per after() tick so
+        # the event loop keeps running during the animation
+        borders = [b for f, b in (('user', 'user_border'), ('pw', 'pw_border'))
+                   if f in fields and hasattr(self, b)]
         try:
-            # Adjust grid padding to simulate shake
-            orig_user_padx = None
-            orig_pw_padx = None
-            if hasattr(self, 'user_border'):
-                info = self.user_border.grid_info()
-                orig_user_padx = info.get('padx', 0)
-            if hasattr(self, 'pw_border'):
-                info = self.pw_border.grid_info()
-                orig_pw_padx = info.get('padx', 0)
-            for i in range(cycles):
-                offset = magnitude if i % 2 == 0 else -magnitude
-                if 'user' in fields and hasattr(self, 'user_border'):
-                    self.user_border.grid_configure(padx=offset)
-                if 'pw' in fields and hasattr(self, 'pw_border'):
-                    self.pw_border.grid_configure(padx=offset)
-                self.update()
-                self.after(delay)
-            # restore
-            if hasattr(self, 'user_border'):
-                self.user_border.grid_configure(padx=orig_user_padx or 0)
-            if hasattr(self, 'pw_border'):
-                self.pw_border.grid_configure(padx=orig_pw_padx or 0)
-            self.update()
-        except Exception:
-            pass
+            if step < cycles:
+                offset = magnitude if step % 2 == 0 else -magnitude
+                for b in borders:
+                    getattr(self, b).grid_configure(padx=offset)
+                self.after(delay, lambda: self._shake_fields(fields, magnitude, cycles, delay, step + 1))
+            else:
+                # restore
+                for b in borders:
+                    getattr(self, b).grid_configure(padx=0)
+        except tk.TclError:
+            pass  # window closed mid-animation
 
     def on_lost(self):
         RecoveryWindow(self)
@@ -1,9 +1,15 @@
 import tkinter as tk
 from tkinter import messagebox
+from tkinter import filedialog
 from tkinter import ttk
 from app import excel_db
+from app import search_index
+from app import export
+from app import watcher
+from app import metrics
+from app.background import LatestOnly
 from app import config
-from app.widgets import NeuButton
+from app.widgets import NeuButton, VirtualList
 import os
 import time
 
@@ -41,10 +47,14 @@ class RecordDialog(tk.Toplevel):
     def on_ok(self):
         # Validaciones simples
         nombre = self.entries["Nombre"].get().strip()
+        cedula = self.entries["Cédula"].get().strip()
         salario = self.entries["Salario"].get().strip()
         if not nombre:
             messagebox.showwarning("Validación", "El campo Nombre es obligatorio.")
             return
+        if not cedula:
+            messagebox.showwarning("Validación", "El campo Cédula es obligatorio.")
+            return
         if salario:
             try:
                 float(salario)
@@ -54,8 +64,64 @@ class RecordDialog(tk.Toplevel):
         self.result = {h: self.entries[h].get().strip() for h in excel_db.HEADERS}
         self.destroy()
 
+class EmployeeCard(tk.Frame):
+    """Card showing one employee; bind_row() lets the same widget show another row."""
+
+    def __init__(self, parent, on_delete, wrap=100, pad=6):
+        # Make card a squarish box with a stronger border and more vertical padding
+        super().__init__(parent, bg=config.THEME_PANEL, bd=0, relief='flat', highlightthickness=1, highlightbackground=config.THEME_BORDER)
+        self._on_delete = on_delete
+        self.key = None
+        self.index = None
+        self.row = None
+        # Right: Delete button (red)
+        # Square delete button: use a compact symbol and make width == height
+        _del_size = 48
+        del_btn = NeuButton(self, text='✖', width=_del_size, height=_del_size, font=("Arial", 14), command=self._delete, bg='#ff6b6b', fg=config.THEME_BG, border=0)
+        del_btn.pack(side='right', padx=8, pady=6, anchor='n')
+        # Center: info grid (four columns: Nombre | Cédula | Cargo | Salario)
+        info = tk.Frame(self, bg=config.THEME_PANEL)
+        info.pack(fill='both', expand=True, padx=6, pady=pad)
+        # Four equal-width columns for horizontal layout
+        info.grid_columnconfigure(0, weight=1)
+        info.grid_columnconfigure(1, weight=1)
+        info.grid_columnconfigure(2, weight=1)
+        info.grid_columnconfigure(3, weight=1)
+        # Place each field as a column: title above the value
+        # Fonts for titles and values (larger values for readability)
+        title_font = ("Arial", 10, "bold")
+        value_font = ("Arial", 13)
+        self.value_labels = []
+        for col, h in enumerate(excel_db.HEADERS):
+            title = tk.Label(info, text=f"{h}", bg=config.THEME_PANEL, fg=config.THEME_MUTED, anchor='w', font=title_font)
+            title.grid(row=0, column=col, sticky='w', padx=6, pady=(0,6))
+            value = tk.Label(info, text="", bg=config.THEME_PANEL, fg=config.THEME_TEXT, anchor='w', justify='left', wraplength=wrap, font=value_font)
+            value.grid(row=1, column=col, sticky='w', padx=6)
+            self.value_labels.append(value)
+        self.wrap = wrap
+
+    def set_wrap(self, wrap):
+        if wrap != self.wrap:
+            self.wrap = wrap
+            for lbl in self.value_labels:
+                lbl.config(wraplength=wrap)
+
+    def bind_row(self, index, row_data):
+        # Bind to the record key (Cédula) so the button survives row shifts; keyless legacy rows fall back to the position
+        self.key = excel_db.record_key(row_data)
+        self.index = index
+        self.row = list(row_data)
+        for lbl, v in zip(self.value_labels, row_data):
+            lbl.config(text=f"{'' if v is None else v}")
+
+    def _delete(self):
+        self._on_delete(self.key, self.index)
+
 class MainApp(tk.Tk):
-    POLL_INTERVAL = 2000  # ms
+    WATCH_DEBOUNCE = 0.3  # s; agrupa ráfagas de escrituras en un solo aviso
+    SEARCH_DEBOUNCE = 150  # ms sin teclear antes de lanzar la búsqueda
+    VIRTUAL_THRESHOLD = 300  # con más tarjetas se usa la lista virtualizada
+    CARD_PACK = dict(fill='x', pady=10, padx=6, ipady=12)
 
     def __init__(self, username):
         super().__init__()
@@ -72,10 +138,15 @@ class MainApp(tk.Tk):
         NeuButton(top_frame, text="Agregar", command=self.on_add, height=40, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0).pack(side=tk.LEFT, padx=4)
         NeuButton(top_frame, text="Editar", command=self.on_edit, height=40, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0).pack(side=tk.LEFT, padx=4)
         NeuButton(top_frame, text="Refrescar", command=self.refresh, height=40, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0).pack(side=tk.LEFT, padx=8)
-        NeuButton(top_frame, text="Exportar CSV", command=self.export_csv, height=40, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0).pack(side=tk.LEFT, padx=8)
+        NeuButton(top_frame, text="Exportar", command=self.export_csv, height=40, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0).pack(side=tk.LEFT, padx=8)
 
         self._search_var = tk.StringVar()
         self._filter_query = ''
+        # Loading and searching run on a worker; only the newest request's result reaches the cards
+        self._search_after = None
+        self._shown_query = None
+        self._loader = LatestOnly(self._load_rows, done=lambda result: self.after(0, lambda: self._show_rows(*result)),
+                                  error=lambda e: self.after(0, self._load_error), name="loader")
         NeuButton(top_frame, text="Salir", command=self.quit, height=40, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0).pack(side=tk.RIGHT, padx=4)
 
         # Search row: placed under the top buttons, full width above the cards
@@ -101,24 +172,33 @@ class MainApp(tk.Tk):
         self._cards_frame_id = self._cards_canvas.create_window((0,0), window=self._cards_frame, anchor='nw')
         # Make inner frame width follow canvas width so cards expand vertically and wrap text instead of compressing horizontally.
         self._cards_canvas.bind('<Configure>', self._on_canvas_config)
-        self._cards_canvas.configure(yscrollcommand=self._cards_scroll.set)
+        self._cards_canvas.configure(yscrollcommand=self._on_cards_scroll)
         self._cards_canvas.pack(side='left', fill='both', expand=True)
         self._cards_scroll.pack(side='right', fill='y')
-        # Keep track of value labels for wrap updates
-        self._card_value_labels = []
+        # Cards in display order, and the pending wrap pass (one per frame while resizing/scrolling)
+        self._card_order = []
+        self._wrap_after = None
+        # Rows currently shown and cards by record key, for incremental updates
+        self._rows = []
+        self._cards = {}
+        # Virtualized list for large result sets: a small pool of cards re-bound while scrolling
+        self._vlist = VirtualList(self._cards_container, factory=self._make_pooled_card, bg=config.THEME_BG)
+        self._vlist.bind('<Configure>', lambda e: self._schedule_wrap(), add='+')
+        self._virtual = False
 
         # Status
         self.status_var = tk.StringVar()
         self.status_var.set("")
         tk.Label(self, textvariable=self.status_var, anchor=tk.W, bg=config.THEME_BG, fg=config.THEME_MUTED).pack(fill=tk.X, padx=10, pady=(0,8))
 
-        # Build initial cards
-        self._build_cards()
+        # Initial cards arrive from the loader; show a placeholder meanwhile
+        tk.Label(self._cards_frame, text="Cargando registros...", bg=config.THEME_BG, fg=config.THEME_MUTED).pack(padx=8, pady=8)
 
         # Estado de archivo
         self._last_mtime = None
         self.refresh()
-        self.after(self.POLL_INTERVAL, self._poll_file)
+        # Vigilar cambios externos (otra instancia, RR. HH. editando el Excel)
+        self._watcher = watcher.watch(lambda: self.after(0, self._on_data_changed), debounce=self.WATCH_DEBOUNCE)
 
         # Bottom frame with Logout button centered below the table
         bottom_frame = tk.Frame(self, bg=config.THEME_BG)
@@ -127,107 +207,225 @@ class MainApp(tk.Tk):
 
 
     def export_csv(self):
-        import csv
-        rows = excel_db.read_all()
-        try:
-            csv_path = os.path.splitext(config.DATA_EXCEL)[0] + ".csv"
-            with open(csv_path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(excel_db.HEADERS)
-                for row in rows:
-                    w.writerow([("" if v is None else v) for v in row])
-            messagebox.showinfo("Exportar CSV", f"Exportado a {csv_path}")
-            self.status_var.set(f"Exportado: {csv_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo exportar CSV: {e}")
+        # Choose destination; the format follows the extension (CSV, CSV gzip, JSON Lines)
+        base = os.path.splitext(config.DATA_EXCEL)[0]
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Exportar", initialdir=os.path.dirname(base), initialfile=os.path.basename(base) + ".csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("CSV comprimido", "*.csv.gz"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        q = self._filter_query
+        only_filtered = False
+        if q:
+            answer = messagebox.askyesnocancel("Exportar", "¿Exportar solo los resultados de la búsqueda actual?")
+            if answer is None:
+                return
+            only_filtered = answer
+        rows = (lambda: [row for _, row in self._filtered_rows(q)]) if only_filtered else None
+        self.status_var.set("Exportando...")
+
+        # Callbacks run on the export worker; hand them over to the Tk thread
+        def progress(done, total):
+            msg = f"Exportando... {done}/{total} filas" if total else f"Exportando... {done} filas"
+            self.after(0, lambda: self.status_var.set(msg))
+
+        def done(count):
+            self.after(0, lambda: self._export_done(path, count))
+
+        def error(e):
+            self.after(0, lambda: self._export_error(e))
+
+        export.start_export(path, rows=rows, progress=progress, done=done, error=error)
+
+    def _export_done(self, path, count):
+        self.status_var.set(f"Exportado: {path} ({count} filas)")
+        messagebox.showinfo("Exportar", f"Exportado a {path}")
+
+    def _export_error(self, e):
+        self.status_var.set("Error al exportar")
+        messagebox.showerror("Error", f"No se pudo exportar: {e}")
 
     def refresh(self):
-        # Rebuild cards from Excel
-        self._build_cards()
-        # actualizar estado
+        # Reload on the worker; the current cards stay visible until the new rows arrive.
+        # Overlapping requests (polls, searches, edits) collapse into a single load.
+        self.status_var.set("Cargando datos...")
+        self._loader.submit(self._filter_query)
+
+    def _load_rows(self, q):
+        # Runs on the loader worker
+        with metrics.timer("gui.refresh.load"):
+            rows_all = excel_db.read_all()
+            # Diffing 100k rows takes a noticeable fraction of a second: do it here, not on Tk.
+            # `shown` is the list the diff was made against; _show_rows only trusts the flag if
+            # the cards still show that same list.
+            shown = self._rows
+            changed = any(watcher.diff_rows(shown, rows_all))
+            return q, rows_all, self._filtered_rows(q, rows_all), shown, changed
+
+    def _show_rows(self, q, rows_all, rows_enum, shown, changed):
+        if q != self._filter_query:
+            return  # superseded by a newer query
+        if q != self._shown_query or changed or shown is not self._rows:
+            with metrics.timer("gui.refresh.render"):
+                self._build_cards(rows_all, rows_enum)
+            metrics.observe("gui.refresh.rows", len(rows_enum))
+            self._shown_query = q
+        self._update_status()
+
+    def _load_error(self):
+        self.status_var.set("Archivo de datos no disponible")
+
+    def _update_status(self):
         try:
             self._last_mtime = os.path.getmtime(config.DATA_EXCEL)
             self.status_var.set(f"Última sincronización: {time.ctime(self._last_mtime)}")
         except Exception:
             self.status_var.set("Archivo de datos no disponible")
 
-    def _build_cards(self):
-        # Reset value label registry and clear existing
-        self._card_value_labels = []
+    def _build_cards(self, rows_all=None, rows_enum=None):
+        # Remove status messages; cards are reconciled by key instead of rebuilt
         for w in self._cards_frame.winfo_children():
-            w.destroy()
-        rows_all = excel_db.read_all()
+            if not isinstance(w, EmployeeCard):
+                w.destroy()
+        if rows_all is None:
+            rows_all = excel_db.read_all()
+        self._rows = rows_all
         if not rows_all:
+            self._set_virtual(False)
+            self._reconcile_cards([])
             tk.Label(self._cards_frame, text="No hay registros.", bg=config.THEME_BG, fg=config.THEME_MUTED).pack(padx=8, pady=8)
             return
-        # Enumerate with original indices so delete operations map to correct rows
-        rows_enum = list(enumerate(rows_all))
-        q = getattr(self, '_filter_query', '').lower()
-        if q:
-            rows_enum = [ (i,row) for i,row in rows_enum if any(q in ('' if v is None else str(v)).lower() for v in row) ]
+        if rows_enum is None:
+            q = getattr(self, '_filter_query', '').lower()
+            rows_enum = self._filtered_rows(q, rows_all)
         if not rows_enum:
+            self._set_virtual(False)
+            self._reconcile_cards([])
             # Mostrar mensaje centrado cuando no hay coincidencias de búsqueda
             lbl = tk.Label(self._cards_frame, text="No se encontraron resultados", bg=config.THEME_BG, fg=config.THEME_MUTED, font=("Arial", 12), anchor='center', justify='center')
             lbl.pack(fill='both', expand=True, padx=8, pady=8)
             return
-        for orig_i, row in rows_enum:
-            self._make_card(orig_i, row)
+        if len(rows_enum) > self.VIRTUAL_THRESHOLD:
+            # The pool replaces the individual cards entirely
+            self._reconcile_cards([])
+            self._set_virtual(True)
+            self._vlist.set_items(rows_enum)
+            return
+        self._set_virtual(False)
+        self._reconcile_cards(rows_enum)
+
+    def _reconcile_cards(self, rows_enum):
+        # Keyed diff against the cards on screen: create only new rows, re-bind
+        # changed ones in place, destroy removed ones and fix the order
+        old = self._cards
+        self._cards = {}
+        order = []
+        for i, row in rows_enum:
+            key = excel_db.record_key(row)
+            if key is None or key in self._cards:
+                key = ("#", i)  # keyless or duplicated legacy rows: match by position
+            card = old.pop(key, None)
+            if card is None:
+                card = self._make_card(i, row)
+            elif card.index != i or card.row != row:
+                card.bind_row(i, row)
+            self._cards[key] = card
+            order.append(card)
+        for card in old.values():
+            card.destroy()
+        packed = self._cards_frame.pack_slaves()
+        if packed != order:
+            kept = set(packed)
+            if [c for c in order if c in kept] == packed:
+                # Same relative order: only slot the new cards in
+                prev = None
+                for card in order:
+                    if card not in kept:
+                        if prev is not None:
+                            card.pack(after=prev, **self.CARD_PACK)
+                        elif packed:
+                            card.pack(before=packed[0], **self.CARD_PACK)
+                        else:
+                            card.pack(**self.CARD_PACK)
+                    prev = card
+            else:
+                for card in packed:
+                    card.pack_forget()
+                for card in order:
+                    card.pack(**self.CARD_PACK)
+        self._card_order = order
+
+    def _set_virtual(self, on):
+        # Swap the plain card canvas and the virtualized list in the same container
+        if on == self._virtual:
+            return
+        self._virtual = on
+        if on:
+            self._cards_canvas.pack_forget()
+            self._cards_scroll.pack_forget()
+            self._vlist.pack(fill='both', expand=True)
+        else:
+            self._vlist.pack_forget()
+            self._vlist.set_items([])
+            self._cards_canvas.pack(side='left', fill='both', expand=True)
+            self._cards_scroll.pack(side='right', fill='y')
+
+    def _make_pooled_card(self, parent):
+        # Extra inner padding stands in for the ipady used when packing regular cards
+        return EmployeeCard(parent, self.on_delete_card, wrap=self._wrap_for(self._vlist.winfo_width()), pad=18)
+
+    def _filtered_rows(self, q, rows_all=None):
+        # Enumerate with original indices so delete operations map to correct rows
+        if q:
+            # Trigram index: substring match without accents ("jose" finds "José")
+            return search_index.search(q)
+        if rows_all is None:
+            rows_all = excel_db.read_all()
+        return list(enumerate(rows_all))
 
     def _make_card(self, index, row_data):
-        # Create a card frame for a record
-        # Make card a squarish box with a stronger border and more vertical padding
-        card = tk.Frame(self._cards_frame, bg=config.THEME_PANEL, bd=0, relief='flat', highlightthickness=1, highlightbackground=config.THEME_BORDER)
-        card.pack(fill='x', pady=10, padx=6, ipady=12)
-        # Right: Delete button (red)
-        # Square delete button: use a compact symbol and make width == height
-        _del_size = 48
-        del_btn = NeuButton(card, text='✖', width=_del_size, height=_del_size, font=("Arial", 14), command=lambda i=index: self.on_delete_card(i), bg='#ff6b6b', fg=config.THEME_BG, border=0)
-        del_btn.pack(side='right', padx=8, pady=6, anchor='n')
-        # Center: info grid (four columns: Nombre | Cédula | Cargo | Salario)
-        info = tk.Frame(card, bg=config.THEME_PANEL)
-        info.pack(fill='both', expand=True, padx=6, pady=6)
-        # Four equal-width columns for horizontal layout
-        info.grid_columnconfigure(0, weight=1)
-        info.grid_columnconfigure(1, weight=1)
-        info.grid_columnconfigure(2, weight=1)
-        info.grid_columnconfigure(3, weight=1)
-        # Place each field as a column: title above the value
-        # Fonts for titles and values (larger values for readability)
-        title_font = ("Arial", 10, "bold")
-        value_font = ("Arial", 13)
-        for idx, (h, v) in enumerate(zip(excel_db.HEADERS, row_data)):
-            col = idx  # 0..3
-            title = tk.Label(info, text=f"{h}", bg=config.THEME_PANEL, fg=config.THEME_MUTED, anchor='w', font=title_font)
-            title.grid(row=0, column=col, sticky='w', padx=6, pady=(0,6))
-            wrap = max(100, int((self._cards_canvas.winfo_width() - 240) / 4))
-            value = tk.Label(info, text=f"{'' if v is None else v}", bg=config.THEME_PANEL, fg=config.THEME_TEXT, anchor='w', justify='left', wraplength=wrap, font=value_font)
-            value.grid(row=1, column=col, sticky='w', padx=6)
-            # Keep track of value labels for wrap updates
-            self._card_value_labels.append(value)
+        # Create a card frame for a record; _reconcile_cards packs it in place
+        card = EmployeeCard(self._cards_frame, self.on_delete_card, wrap=self._wrap_for(self._cards_canvas.winfo_width()))
+        card.bind_row(index, row_data)
+        return card
 
-    def on_delete_card(self, index):
+    def on_delete_card(self, key, index=None):
         if not messagebox.askyesno('Eliminar', '¿Desea eliminar el registro seleccionado?'):
             return
-        excel_db.delete_record(index)
+        try:
+            if key is not None:
+                excel_db.delete_by_key(key)
+            else:
+                excel_db.delete_record(index)
+        except (KeyError, IndexError):
+            messagebox.showwarning('Eliminar', 'Registro no encontrado')
         self.refresh()
 
-    def on_edit_card(self, index):
-        rows = excel_db.read_all()
-        if index < 0 or index >= len(rows):
+    def on_edit_card(self, key):
+        data = excel_db.get_record(key)
+        if data is None:
             messagebox.showwarning('Editar', 'Registro no encontrado')
             return
-        data = rows[index]
         dlg = RecordDialog(self, title='Editar empleado', data=data)
         self.wait_window(dlg)
         if dlg.result:
-            excel_db.update_record(index, dlg.result)
+            try:
+                excel_db.update_by_key(key, dlg.result)
+            except (KeyError, ValueError) as e:
+                messagebox.showwarning('Editar', e.args[0])
+                return
             self.refresh()
 
     def on_add(self):
         dlg = RecordDialog(self, title="Agregar empleado")
         self.wait_window(dlg)
         if dlg.result:
-            excel_db.add_record(dlg.result)
+            try:
+                excel_db.add_record(dlg.result)
+            except ValueError as e:
+                messagebox.showwarning('Agregar', str(e))
+                return
             self.refresh()
 
     def on_edit(self):
@@ -236,36 +434,88 @@ class MainApp(tk.Tk):
     def on_delete(self):
         messagebox.showinfo("Eliminar", "Use el botón 'Eliminar' dentro de la tarjeta correspondiente para borrar un registro.")
 
-    def _poll_file(self):
-        try:
-            m = os.path.getmtime(config.DATA_EXCEL)
-            if self._last_mtime is None or m != self._last_mtime:
-                # archivo cambiado externamente
-                self.refresh()
-        except Exception:
-            pass
-        self.after(self.POLL_INTERVAL, self._poll_file)
+    def _on_data_changed(self):
+        # Avisado por el watcher. La carga va al hilo de fondo; _show_rows no toca
+        # la interfaz si las filas no cambiaron y si cambiaron reconcilia por clave
+        self.refresh()
+
+    def destroy(self):
+        if getattr(self, '_watcher', None) is not None:
+            self._watcher.stop()
+        super().destroy()
 
     def _on_canvas_config(self, e):
-        # Keep inner frame width synced with canvas and update wraplengths of value labels
+        # Keep inner frame width synced with canvas; wraplengths follow in a coalesced pass
         try:
             self._cards_canvas.itemconfig(self._cards_frame_id, width=e.width)
         except Exception:
             pass
-        for lbl in getattr(self, '_card_value_labels', []):
-            try:
-                # Now cards have 4 columns, compute wrap per column
-                lbl.config(wraplength=max(100, int((e.width - 260) / 4)))
-            except Exception:
-                pass
+        self._schedule_wrap()
+
+    def _on_cards_scroll(self, first, last):
+        self._cards_scroll.set(first, last)
+        # Cards scrolled into view may still carry an old wraplength
+        self._schedule_wrap()
+
+    @staticmethod
+    def _wrap_for(width):
+        # Now cards have 4 columns, compute wrap per column
+        return max(100, int((width - 260) / 4))
+
+    def _schedule_wrap(self):
+        # Dragging the window edge fires many <Configure> events; handle at most one per frame
+        if self._wrap_after is None:
+            self._wrap_after = self.after(16, self._apply_wrap)
+
+    def _apply_wrap(self):
+        self._wrap_after = None
+        if self._virtual:
+            wrap = self._wrap_for(self._vlist.winfo_width())
+            cards = self._vlist.widgets()
+        else:
+            wrap = self._wrap_for(self._cards_canvas.winfo_width())
+            cards = self._visible_cards()
+        # set_wrap skips cards already at this width: an unchanged width touches no labels
+        for card in cards:
+            card.set_wrap(wrap)
+
+    def _visible_cards(self):
+        # Cards are stacked in display order: binary search the first one in view
+        order = self._card_order
+        if not order:
+            return []
+        top = self._cards_canvas.canvasy(0)
+        bottom = top + self._cards_canvas.winfo_height()
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            card = order[mid]
+            if card.winfo_y() + card.winfo_height() < top:
+                lo = mid + 1
+            else:
+                hi = mid
+        visible = []
+        for card in order[lo:]:
+            if card.winfo_y() > bottom:
+                break
+            visible.append(card)
+        return visible
 
     def _on_search_change(self, event=None):
-        # Update filter query and refresh cards
+        # Update filter query; typing is debounced, the magnifier button searches right away
         try:
             q = self._search_var.get().strip().lower()
-            self._filter_query = q
         except Exception:
-            self._filter_query = ''
+            q = ''
+        if event is not None and q == self._filter_query:
+            return  # arrows, shift, etc. don't change the query
+        self._filter_query = q
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(self.SEARCH_DEBOUNCE if event is not None else 0, self._start_search)
+
+    def _start_search(self):
+        self._search_after = None
         self.refresh()
 
     def on_logout(self):
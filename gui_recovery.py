@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 from app import email_utils, auth, config
-from app.widgets import NeuButton
+from app.widgets import NeuButton, when_done
 
 
 class ThemedInputDialog(tk.Toplevel):
@@ -264,10 +264,8 @@ class RecoveryWindow(tk.Toplevel):
         # Preguntar si se desea usar el código como contraseña temporal
         use_code = messagebox.askyesno("Usar código", "¿Desea usar el código de 5 dígitos como contraseña temporal?")
         if use_code:
-            username = auth.get_username_by_email(email)
-            auth.set_password_for_username(username, entered.strip())
-            messagebox.showinfo("Listo", "Se ha establecido la contraseña temporal (el código). Por favor inicie sesión y cámbiela.")
-            self.destroy()
+            self._save_password(email, entered.strip(),
+                                "Se ha establecido la contraseña temporal (el código). Por favor inicie sesión y cámbiela.")
             return
         # Themed dialog for new password
         pwd_dlg = ThemedInputDialog(self, "Nueva contraseña", "Ingrese nueva contraseña:", show='*')
@@ -275,8 +273,22 @@ class RecoveryWindow(tk.Toplevel):
         new_pwd = pwd_dlg.result
         if not new_pwd:
             return
-        auth.set_password_for_username(auth.get_username_by_email(email), new_pwd)
-        messagebox.showinfo("Listo", "Contraseña cambiada correctamente")
+        self._save_password(email, new_pwd, "Contraseña cambiada correctamente")
+
+    def _save_password(self, email, password, done_msg):
+        # Hashing runs on the auth pool; the window stays responsive meanwhile
+        if self.status:
+            self.status.config(text="Guardando contraseña...")
+        future = auth.set_password_async(auth.get_username_by_email(email), password)
+        when_done(self, future, lambda f: self._password_saved(f, done_msg))
+
+    def _password_saved(self, future, done_msg):
+        try:
+            future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo cambiar la contraseña: {e}")
+            return
+        messagebox.showinfo("Listo", done_msg)
         self.destroy()
 
     def _send_error(self, exc):
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import messagebox
-from app.widgets import NeuButton
+from app.widgets import NeuButton, Spinner, when_done
 from app import auth, config
 
 class RegisterWindow(tk.Toplevel):
@@ -41,11 +41,16 @@ class RegisterWindow(tk.Toplevel):
         self.pwd_entry.pack(fill='x', padx=6, pady=8)
 
         # Aceptar button centered
-        save_btn = NeuButton(frame, text="Aceptar", command=self.on_save, height=44, width=220, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0)
-        save_btn.grid(row=7, column=0, pady=(14,6))
+        self.save_btn = NeuButton(frame, text="Aceptar", command=self.on_save, height=44, width=220, bg=config.THEME_ACCENT, fg=config.THEME_BG, border=0)
+        self.save_btn.grid(row=7, column=0, pady=(14,6))
+
+        # Busy indicator while the password is hashed off the Tk thread
+        self.spinner = Spinner(frame, fg=config.THEME_MUTED, font=("Arial", 11))
+        self.spinner.grid(row=8, column=0)
+        self._pending = False
 
         # Make flexible space below
-        frame.grid_rowconfigure(8, weight=1)
+        frame.grid_rowconfigure(9, weight=1)
         frame.grid_columnconfigure(0, weight=1)
 
     def on_save(self):
@@ -55,8 +60,24 @@ class RegisterWindow(tk.Toplevel):
         if not username or not email or not pwd:
             messagebox.showwarning('Campos vacíos', 'Complete todos los campos')
             return
+        if self._pending:
+            return
+        self._set_busy(True)
+        when_done(self, auth.add_user_async(username, pwd, email), self._save_done)
+
+    def _set_busy(self, busy):
+        self._pending = busy
+        self.save_btn.set_state('disabled' if busy else 'normal')
+        self.config(cursor='watch' if busy else '')
+        if busy:
+            self.spinner.start('Registrando...')
+        else:
+            self.spinner.stop()
+
+    def _save_done(self, future):
+        self._set_busy(False)
         try:
-            auth.add_user(username, pwd, email)
+            future.result()
             messagebox.showinfo('Registro', 'Usuario registrado correctamente')
             self.destroy()
         except Exception as e:
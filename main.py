@@ -1,5 +1,8 @@
+from app import auth
 from app.gui_login import LoginWindow
 
 if __name__ == '__main__':
+    # Crear el admin por defecto en segundo plano mientras se abre la ventana
+    auth.init_async()
     win = LoginWindow()
     win.mainloop()
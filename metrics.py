@@ -0,0 +1,209 @@
+import atexit
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from app import config
+from app import fileutil
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores de los histogramas: segundos para tiempos, unidades para tamaños
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# Registro de métricas del proceso. Si está desactivado, timer() devuelve un
+# contexto vacío compartido y timed() llama directamente a la función: el
+# coste es una consulta a un diccionario.
+_lock = threading.Lock()
+_state = {"enabled": config.METRICS_ENABLED}
+_counters = {}
+_histograms = {}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max", "unit")
+
+    def __init__(self, buckets, unit):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.unit = unit
+
+    def observe(self, value):
+        i = 0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self):
+        cumulative, total = {}, 0
+        for bound, n in zip(self.buckets + ("+Inf",), self.counts):
+            total += n
+            cumulative[str(bound)] = total
+        return {"unit": self.unit, "count": self.count, "sum": self.sum, "min": self.min,
+                "max": self.max, "mean": self.sum / self.count if self.count else None,
+                "buckets": cumulative}
+
+
+def enabled():
+    return _state["enabled"]
+
+
+def enable(on=True):
+    """Activa (o desactiva) el registro de métricas en tiempo de ejecución."""
+    _state["enabled"] = bool(on)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def inc(name, value=1):
+    """Suma value al contador name."""
+    if not _state["enabled"]:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, value, buckets=COUNT_BUCKETS, unit=None):
+    """Registra un valor en el histograma name (los límites se fijan la primera vez)."""
+    if not _state["enabled"]:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = _Histogram(buckets, unit)
+        hist.observe(value)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, TIME_BUCKETS, "seconds")
+        if exc_type is not None:
+            inc(self.name + ".errors")
+        return False
+
+
+def timer(name):
+    """Mide la duración del bloque en el histograma name (en segundos).
+
+        with metrics.timer("excel_db.workbook_save"):
+            wb.save(path)
+
+    Si el bloque lanza una excepción también se cuenta en name + ".errors".
+    """
+    if not _state["enabled"]:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def timed(name):
+    """Decorador equivalente a envolver la función entera en timer(name)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Copia del estado actual: {"timestamp", "counters", "histograms"}."""
+    with _lock:
+        return {"timestamp": time.time(), "counters": dict(_counters),
+                "histograms": {name: hist.to_dict() for name, hist in _histograms.items()}}
+
+
+def to_json(snap=None):
+    return json.dumps(snap or snapshot(), indent=2, ensure_ascii=False)
+
+
+def _prom_name(name):
+    return "app_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def to_prometheus(snap=None):
+    """Instantánea en el formato de texto de Prometheus."""
+    snap = snap or snapshot()
+    lines = []
+    for name, value in sorted(snap["counters"].items()):
+        metric = _prom_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, hist in sorted(snap["histograms"].items()):
+        metric = _prom_name(name) + ("_" + hist["unit"] if hist["unit"] else "")
+        lines.append(f"# TYPE {metric} histogram")
+        for bound, n in hist["buckets"].items():
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {n}')
+        lines.append(f"{metric}_sum {hist['sum']}")
+        lines.append(f"{metric}_count {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path=None, fmt=None):
+    """Escribe una instantánea en path (por defecto config.METRICS_FILE).
+
+    fmt es "json" o "prometheus"; si no se indica se deduce de la extensión
+    (.prom o .txt -> Prometheus). La escritura es atómica. Devuelve la ruta.
+    """
+    path = path or config.METRICS_FILE
+    if fmt is None:
+        fmt = "prometheus" if os.path.splitext(path)[1] in (".prom", ".txt") else "json"
+    if fmt not in ("json", "prometheus"):
+        raise ValueError(f"Formato de métricas desconocido: {fmt}")
+    text = to_prometheus() if fmt == "prometheus" else to_json()
+    with fileutil.atomic_write(path, encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+@atexit.register
+def _dump_at_exit():
+    if not _state["enabled"] or not (_counters or _histograms):
+        return
+    try:
+        dump()
+    except Exception:
+        logger.exception("No se pudieron guardar las métricas en %s", config.METRICS_FILE)
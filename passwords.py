@@ -0,0 +1,230 @@
+"""Esquema de hash de contraseñas compartido por auth y create_user.
+
+Vive en su propio módulo, sin efectos al importarse, para que los procesos
+que calculan hashes en paralelo no tengan que importar auth. La biblioteca de
+hash se carga en el primer uso: importar passlib cuesta unos 40 ms que no
+tienen por qué pagarse antes de mostrar la primera ventana.
+
+Con passlib se usa pbkdf2_sha256 con un número de rondas calibrado para este
+equipo (ver calibrate()); needs_update() indica qué hashes guardados conviene
+recalcular: los de menos rondas y los bcrypt de versiones antiguas de
+create_user.py.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from app import config
+from app import fileutil
+
+logger = logging.getLogger(__name__)
+
+# Rondas por debajo de las cuales nunca se baja: el valor por defecto de
+# passlib con el que están hechos los hashes existentes
+MIN_ROUNDS = 29000
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+
+def _time_pbkdf2(rounds):
+    # passlib usa hashlib.pbkdf2_hmac, así que el coste es el mismo
+    start = time.perf_counter()
+    hashlib.pbkdf2_hmac("sha256", b"calibration", b"0123456789abcdef", rounds)
+    return time.perf_counter() - start
+
+
+def calibrate(target_ms=None, probe_rounds=20000):
+    """Rondas de pbkdf2_sha256 para que verificar tarde unos target_ms en este equipo.
+
+    Se mide el mejor de tres intentos con probe_rounds y se extrapola; el
+    resultado se redondea a miles y nunca baja de MIN_ROUNDS.
+    """
+    target = (target_ms or config.PASSWORD_HASH_TARGET_MS) / 1000.0
+    elapsed = min(_time_pbkdf2(probe_rounds) for _ in range(3))
+    rounds = int(probe_rounds * target / elapsed) // 1000 * 1000
+    return max(MIN_ROUNDS, rounds)
+
+
+def _read_settings():
+    try:
+        with open(config.SETTINGS_FILE, "r", encoding="utf-8") as f:
+            settings = json.load(f)
+        return settings if isinstance(settings, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        logger.warning("No se pudo leer %s; se ignora", config.SETTINGS_FILE)
+        return {}
+
+
+def _write_settings(settings):
+    with fileutil.atomic_write(config.SETTINGS_FILE, encoding="utf-8") as f:
+        json.dump(settings, f, indent=2, ensure_ascii=False)
+
+
+def save_calibration(target_ms=None):
+    """Calibra y guarda las rondas en config.SETTINGS_FILE; devuelve las rondas.
+
+    Un target_ms explícito queda fijado: configured_rounds() no recalibra
+    aunque no coincida con PASSWORD_HASH_TARGET_MS.
+    """
+    explicit = target_ms is not None
+    target_ms = target_ms or config.PASSWORD_HASH_TARGET_MS
+    rounds = calibrate(target_ms)
+    settings = _read_settings()
+    settings.update(pbkdf2_rounds=rounds, pbkdf2_target_ms=target_ms, pbkdf2_target_explicit=explicit)
+    try:
+        _write_settings(settings)
+    except Exception:
+        logger.exception("No se pudo guardar la calibración en %s", config.SETTINGS_FILE)
+    logger.info("Hash de contraseñas calibrado: %s rondas (~%s ms)", rounds, target_ms)
+    return rounds
+
+
+def configured_rounds():
+    """Rondas en uso: PASSWORD_ROUNDS, o la calibración guardada (se calibra si falta
+    o si se hizo para otro tiempo objetivo que no se fijó a mano)."""
+    if config.PASSWORD_ROUNDS:
+        return max(MIN_ROUNDS, config.PASSWORD_ROUNDS)
+    settings = _read_settings()
+    rounds = settings.get("pbkdf2_rounds")
+    stale = (not settings.get("pbkdf2_target_explicit")
+             and settings.get("pbkdf2_target_ms") != config.PASSWORD_HASH_TARGET_MS)
+    if not rounds or stale:
+        rounds = save_calibration()
+    return max(MIN_ROUNDS, int(rounds))
+
+
+def _verify_bcrypt(password, hashed):
+    # Hashes escritos por versiones anteriores de create_user.py. Se usa el
+    # paquete bcrypt directamente: su backend en passlib 1.7 falla con bcrypt 4.1+
+    import bcrypt
+    return bcrypt.checkpw(password.encode("utf-8")[:72], hashed.encode("ascii"))
+
+
+class _ContextHasher:
+    """pbkdf2_sha256 (passlib CryptContext) con las rondas calibradas."""
+
+    def __init__(self, rounds):
+        from passlib.context import CryptContext  # type: ignore
+        self.rounds = rounds
+        self.context = CryptContext(schemes=["pbkdf2_sha256"],
+                                    pbkdf2_sha256__default_rounds=rounds,
+                                    pbkdf2_sha256__min_rounds=rounds)
+
+    def hash(self, password):
+        return self.context.hash(password)
+
+    def verify(self, password, hashed):
+        if hashed.startswith(_BCRYPT_PREFIXES):
+            return _verify_bcrypt(password, hashed)
+        return self.context.verify(password, hashed)
+
+    def needs_update(self, hashed):
+        if hashed.startswith(_BCRYPT_PREFIXES):
+            return True
+        return self.context.needs_update(hashed)
+
+
+def _load_hasher():
+    try:
+        # Prefer passlib if available; use pbkdf2_sha256 backend to avoid bcrypt binary
+        import passlib.context  # type: ignore  # noqa: F401
+    except Exception:
+        pass
+    else:
+        return _ContextHasher(configured_rounds())
+    # Fallback to werkzeug if passlib is not installed
+    try:
+        # Import werkzeug dynamically to avoid static import errors in editors
+        import importlib
+        werkzeug_security = importlib.import_module("werkzeug.security")
+        generate_password_hash = getattr(werkzeug_security, "generate_password_hash")
+        check_password_hash = getattr(werkzeug_security, "check_password_hash")
+
+        class _HasherWrapper:
+            @staticmethod
+            def hash(password):
+                return generate_password_hash(password, method="pbkdf2:sha256")
+
+            @staticmethod
+            def verify(password, hashed):
+                # werkzeug.check_password_hash expects (hashed, password)
+                return check_password_hash(hashed, password)
+
+            @staticmethod
+            def needs_update(hashed):
+                return False
+
+        return _HasherWrapper()
+    except Exception:
+        # Last-resort fallback (insecure plain-text) to avoid runtime errors when
+        # no hashing library is available. Install passlib or werkzeug for proper
+        # password hashing in production.
+        class _PlainWrapper:
+            @staticmethod
+            def hash(password):
+                return password
+
+            @staticmethod
+            def verify(password, hashed):
+                return password == hashed
+
+            @staticmethod
+            def needs_update(hashed):
+                return False
+
+        return _PlainWrapper()
+
+
+class _LazyHasher:
+    """Expone hash/verify/needs_update y carga la implementación real la primera vez."""
+
+    def __init__(self):
+        self._impl = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._impl is None:
+            with self._lock:
+                if self._impl is None:
+                    self._impl = _load_hasher()
+        return self._impl
+
+    def reset(self):
+        """Vuelve a leer la configuración (p. ej. tras recalibrar) en el próximo uso."""
+        with self._lock:
+            self._impl = None
+
+    def hash(self, password):
+        return self._get().hash(password)
+
+    def verify(self, password, hashed):
+        return self._get().verify(password, hashed)
+
+    def needs_update(self, hashed):
+        """True si el hash es de un esquema antiguo o tiene menos rondas de las configuradas."""
+        return self._get().needs_update(hashed)
+
+
+hasher = _LazyHasher()
+
+
+def hash_password(password):
+    """Hash de password con el esquema de la aplicación (apto para ProcessPoolExecutor)."""
+    return hasher.hash(password)
+
+
+if __name__ == '__main__':
+    import argparse
+    p = argparse.ArgumentParser(description="Calibrar el coste del hash de contraseñas")
+    p.add_argument("accion", choices=["calibrate"])
+    p.add_argument("--target-ms", type=float, help="Tiempo objetivo de verificación en ms")
+    args = p.parse_args()
+    rounds = save_calibration(args.target_ms)
+    # Se mide con las rondas guardadas, que son las que usará la aplicación
+    elapsed = min(_time_pbkdf2(rounds) for _ in range(3))
+    print(f"{rounds} rondas; verificar tarda {elapsed * 1000:.0f} ms "
+          f"(guardado en {config.SETTINGS_FILE})")
+    if config.PASSWORD_ROUNDS:
+        print(f"Aviso: PASSWORD_ROUNDS={config.PASSWORD_ROUNDS} en config tiene prioridad sobre la calibración")
@@ -0,0 +1,348 @@
+import atexit
+import logging
+import pickle
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from app import config
+from app import excel_db
+from app import fileutil
+
+logger = logging.getLogger(__name__)
+
+# Versión del formato en disco; si cambia se reconstruye el índice
+FORMAT_VERSION = 1
+# Separador entre celdas: una búsqueda nunca coincide a caballo entre dos columnas
+_SEP = "\x1f"
+
+_lock = threading.RLock()
+_state = {"index": None, "key": None, "version": None}
+
+
+def fold(text):
+    """Minúsculas y sin tildes: "Cédula" -> "cedula"."""
+    text = str(text).lower()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _row_text(row):
+    return _SEP.join(fold("" if v is None else v) for v in row)
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _tokens(text):
+    return set(text.replace(_SEP, " ").split())
+
+
+def _doc_keys(rows):
+    """Clave estable de cada fila: su cédula, o ("#", posición) si no tiene o está repetida."""
+    keys, seen = [], set()
+    for i, row in enumerate(rows):
+        key = excel_db.record_key(row)
+        if key is None or key in seen:
+            key = ("#", i)
+        seen.add(key)
+        keys.append(key)
+    return keys
+
+
+def _posting(postings, term):
+    # Los postings cargados de disco son arrays compactos; se pasan a set al modificarlos
+    ids = postings.get(term)
+    if ids is None:
+        ids = postings[term] = set()
+    elif not isinstance(ids, set):
+        ids = postings[term] = set(ids)
+    return ids
+
+
+class SearchIndex:
+    """Índice invertido de la tabla de empleados para el buscador.
+
+    Cada fila es un documento identificado por su cédula (internamente, por un
+    id entero). Se guardan postings por trigrama (búsqueda de subcadenas) y por
+    palabra completa (búsqueda por prefijo), todo normalizado con fold().
+    update(rows) compara la tabla entera y reindexa las filas que cambiaron;
+    apply(entries) aplica directamente los cambios del journal de excel_db.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._docs = {}      # clave -> (id, fila indexada como tupla)
+        self._keys = {}      # id -> clave
+        self._text = {}      # id -> texto normalizado de la fila
+        self._order = []     # id del documento en cada posición de self.rows
+        self._pos = {}       # id -> posición en self.rows (None: recalcular desde _order)
+        self._grams = {}     # trigrama -> ids
+        self._words = {}     # palabra -> ids
+        self._next_id = 0
+        self._sorted_words = None
+        self.dirty = False
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add(self, key, row):
+        doc = self._next_id
+        self._next_id += 1
+        text = _row_text(row)
+        self._docs[key] = (doc, row)
+        self._keys[doc] = key
+        self._text[doc] = text
+        for gram in _trigrams(text):
+            _posting(self._grams, gram).add(doc)
+        for word in _tokens(text):
+            _posting(self._words, word).add(doc)
+        return doc
+
+    def _remove(self, key):
+        doc, _ = self._docs.pop(key)
+        del self._keys[doc]
+        text = self._text.pop(doc)
+        for postings, terms in ((self._grams, _trigrams(text)), (self._words, _tokens(text))):
+            for term in terms:
+                ids = _posting(postings, term)
+                ids.discard(doc)
+                if not ids:
+                    del postings[term]
+
+    def update(self, rows):
+        """Sincroniza el índice con `rows`; devuelve cuántos documentos cambiaron."""
+        keys = _doc_keys(rows)
+        new_docs = {key: tuple(row) for key, row in zip(keys, rows)}
+        changed = 0
+        for key in [k for k in self._docs if k not in new_docs]:
+            self._remove(key)
+            changed += 1
+        for key, row in new_docs.items():
+            old = self._docs.get(key)
+            if old is not None:
+                if old[1] == row:
+                    continue
+                self._remove(key)
+            self._add(key, row)
+            changed += 1
+        self.rows = rows
+        docs = self._docs
+        self._order = [docs[key][0] for key in keys]
+        self._pos = None
+        if changed:
+            self._sorted_words = None
+            self.dirty = True
+        return changed
+
+    def _new_key(self, row):
+        key = excel_db.record_key(row)
+        if key is None or key in self._docs:
+            # Sin cédula o repetida: una clave propia que no choca con las ("#", posición) de update()
+            key = ("#", -1 - self._next_id)
+        return key
+
+    def _positions(self):
+        if self._pos is None:
+            self._pos = {doc: i for i, doc in enumerate(self._order)}
+        return self._pos
+
+    def _replace(self, pairs):
+        # Primero se quitan todas las filas viejas: un intercambio de cédulas queda bien indexado
+        pos = self._pos
+        for i, _ in pairs:
+            self._remove(self._keys[self._order[i]])
+            if pos is not None:
+                del pos[self._order[i]]
+        for i, row in pairs:
+            doc = self._add(self._new_key(row), tuple(row))
+            self.rows[i] = row
+            self._order[i] = doc
+            if pos is not None:
+                pos[doc] = i
+
+    def _delete(self, positions):
+        for i in sorted(set(positions), reverse=True):
+            self._remove(self._keys[self._order[i]])
+            del self.rows[i]
+            del self._order[i]
+        self._pos = None
+
+    def _updated(self, i, values):
+        # Igual que excel_db: se sustituyen las columnas conocidas y se conservan las extra
+        row = list(self.rows[i])
+        row[:len(values)] = values
+        return i, row
+
+    def apply(self, entries):
+        """Aplica entradas del journal (ver excel_db.changes_since) sin recorrer la
+        tabla; solo se reindexan las filas afectadas. Devuelve cuántas cambiaron."""
+        changed = 0
+        for entry in entries:
+            op = entry["op"]
+            if op == "add":
+                for values in entry["rows"]:
+                    row = list(values)
+                    doc = self._add(self._new_key(row), tuple(row))
+                    if self._pos is not None:
+                        self._pos[doc] = len(self.rows)
+                    self.rows.append(row)
+                    self._order.append(doc)
+                    changed += 1
+            elif op in ("update", "update_key"):
+                if op == "update":
+                    targets = entry["rows"]
+                else:
+                    pos = self._positions()
+                    targets = [(pos[self._docs[key][0]], values)
+                               for key, values in entry["rows"] if key in self._docs]
+                pairs = [self._updated(i, values) for i, values in targets]
+                self._replace(pairs)
+                changed += len(pairs)
+            elif op in ("delete", "delete_key"):
+                if op == "delete":
+                    positions = entry["indexes"]
+                else:
+                    pos = self._positions()
+                    positions = [pos[self._docs[key][0]] for key in entry["keys"] if key in self._docs]
+                self._delete(positions)
+                changed += len(positions)
+            else:
+                raise ValueError(f"Operación desconocida en el journal: {op}")
+        if changed:
+            self._sorted_words = None
+            self.dirty = True
+        return changed
+
+    def _result(self, ids):
+        pos = self._positions()
+        rows = self.rows
+        return [(i, rows[i]) for i in sorted(pos[d] for d in ids)]
+
+    def search(self, query):
+        """Filas (posición, fila) con alguna celda que contenga la consulta."""
+        q = fold(query).strip()
+        if not q:
+            return list(enumerate(self.rows))
+        if len(q) < 3:
+            # Sin trigramas posibles: se recorre el texto ya normalizado
+            return self._result(d for d, text in self._text.items() if q in text)
+        grams = sorted((self._grams.get(g, ()) for g in _trigrams(q)), key=len)
+        if not len(grams[0]):
+            return []
+        candidates = grams[0]
+        if len(grams) > 1 and len(grams[1]) < 4 * len(candidates):
+            candidates = set(candidates).intersection(grams[1])
+        # Los trigramas solo acotan candidatos; se confirma la subcadena completa
+        text = self._text
+        return self._result(d for d in candidates if q in text[d])
+
+    def search_prefix(self, query):
+        """Filas con alguna palabra que empiece por la consulta."""
+        q = fold(query).strip()
+        if not q:
+            return list(enumerate(self.rows))
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._words)
+        words = self._sorted_words
+        ids = set()
+        i = bisect_left(words, q)
+        while i < len(words) and words[i].startswith(q):
+            ids.update(self._words[words[i]])
+            i += 1
+        return self._result(ids)
+
+    def save(self, path):
+        """Guarda el índice de forma atómica (temporal + os.replace)."""
+        def packed(postings):
+            return {term: array("I", ids).tobytes() for term, ids in postings.items()}
+
+        data = {"version": FORMAT_VERSION, "docs": self._docs, "text": self._text,
+                "grams": packed(self._grams), "words": packed(self._words),
+                "next_id": self._next_id}
+        with fileutil.atomic_write(path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Carga un índice guardado; None si no existe o no es compatible."""
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Índice de búsqueda ilegible en %s; se reconstruirá", path)
+            return None
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            return None
+        def unpacked(postings):
+            result = {}
+            for term, raw in postings.items():
+                ids = array("I")
+                ids.frombytes(raw)
+                result[term] = ids
+            return result
+
+        index = cls()
+        index._docs = data["docs"]
+        index._keys = {doc: key for key, (doc, _) in index._docs.items()}
+        index._text = data["text"]
+        index._grams = unpacked(data["grams"])
+        index._words = unpacked(data["words"])
+        index._next_id = data["next_id"]
+        return index
+
+
+def get_index():
+    """Índice de la tabla actual; al cambiar los datos se actualiza de forma incremental.
+
+    La primera vez se parte del índice guardado en config.SEARCH_INDEX_FILE (si
+    existe) y solo se reindexan las filas que cambiaron desde entonces. Después
+    se aplican los cambios que excel_db conoce (escrituras propias y journal de
+    otras instancias) sin recorrer la tabla; solo tras una recarga completa de
+    los datos, o con otro motor, se vuelve a comparar toda la tabla.
+    """
+    backend = excel_db.get_backend()
+    key = (backend, excel_db.data_stamp())
+    with _lock:
+        if _state["key"] == key:
+            return _state["index"]
+        index = _state["index"]
+        first = index is None or _state["key"][0] is not backend
+        if first:
+            index = SearchIndex.load(config.SEARCH_INDEX_FILE) or SearchIndex()
+        version, entries, rows = excel_db.changes_since(None if first else _state["version"])
+        if entries is not None:
+            index.apply(entries)
+        elif index.update(rows) and first:
+            # Primera carga del proceso: dejar el índice en disco cuanto antes
+            _save(index)
+        _state.update(index=index, key=key, version=version)
+        return index
+
+
+def search(query):
+    # get_index() actualiza el índice en su sitio: la consulta se hace con el
+    # mismo bloqueo para no leer postings a medio actualizar desde otro hilo
+    with _lock:
+        return get_index().search(query)
+
+
+def _save(index):
+    try:
+        index.save(config.SEARCH_INDEX_FILE)
+    except Exception:
+        logger.exception("No se pudo guardar el índice de búsqueda en %s", config.SEARCH_INDEX_FILE)
+
+
+@atexit.register
+def _save_at_exit():
+    with _lock:
+        index = _state["index"]
+        if index is not None and index.dirty:
+            _save(index)
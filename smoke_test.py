@@ -1,11 +1,144 @@
+import csv
+import gzip
+import json
 import os
+import shutil
+import sys
+import tempfile
 import app.excel_db as excel_db
+import app.export as export
 import app.auth as auth
 import app.email_utils as email_utils
 import app.config as config
 
+# Cédulas de prueba: se borran al terminar para no dejar rastro en los datos
+TEST_KEYS = ["smoke-1", "smoke-2", "smoke-3"]
+failures = []
+
+
+def _use_temp_dir():
+    """Redirige todos los archivos de la aplicación a un directorio temporal.
+
+    Así el smoke test empieza siempre con datos vacíos y nunca modifica
+    data.xlsx, users.db ni el resto de archivos reales.
+    """
+    workdir = tempfile.mkdtemp(prefix="smoke-")
+    for name in ("DATA_EXCEL", "DATA_SQLITE", "USERS_FILE", "USERS_DB", "SETTINGS_FILE",
+                 "SEARCH_INDEX_FILE", "METRICS_FILE"):
+        setattr(config, name, os.path.join(workdir, os.path.basename(getattr(config, name))))
+    # email.log se escribe en BASE_DIR
+    config.BASE_DIR = workdir
+    return workdir
+
+
+def check(label, ok):
+    print(f"{label}: {'OK' if ok else 'FALLO'}")
+    if not ok:
+        failures.append(label)
+
+
+def _keys():
+    return {excel_db.record_key(row) for row in excel_db.read_all()}
+
+
+def _record(nombre, cedula):
+    return {"Nombre": nombre, "Cédula": cedula, "Cargo": "QA", "Salario": "1000"}
+
+
+def run_batch():
+    print("Lote con error: no debe guardarse nada...")
+    before = excel_db.read_all()
+    try:
+        with excel_db.batch():
+            excel_db.add_record(_record("Smoke 1", "smoke-1"))
+            raise RuntimeError("fallo simulado")
+    except RuntimeError:
+        pass
+    check("Rollback del lote", excel_db.read_all() == before)
+
+    print("Lote con dos altas...")
+    with excel_db.batch():
+        excel_db.add_record(_record("Smoke 1", "smoke-1"))
+        excel_db.add_record(_record("Smoke 2", "smoke-2"))
+    check("Lote guardado", {"smoke-1", "smoke-2"} <= _keys())
+
+
+def run_keyed():
+    print("Operaciones por cédula...")
+    check("get_record", (excel_db.get_record("smoke-1") or [None])[0] == "Smoke 1")
+    excel_db.update_by_key("smoke-1", _record("Smoke 1b", "smoke-1"))
+    check("update_by_key", excel_db.get_record("smoke-1")[0] == "Smoke 1b")
+    try:
+        excel_db.add_record(_record("Duplicado", "smoke-2"))
+        check("Cédula duplicada rechazada", False)
+    except ValueError:
+        check("Cédula duplicada rechazada", True)
+    excel_db.delete_by_key("smoke-2")
+    check("delete_by_key", excel_db.get_record("smoke-2") is None)
+
+
+def run_journal():
+    if config.DATA_BACKEND != "excel" or not config.DATA_JOURNAL_ENABLED:
+        print("Journal desactivado o motor distinto de Excel: se omite")
+        return
+    print("Journal: releer desde disco y compactar...")
+    journal = config.DATA_EXCEL + ".journal"
+    excel_db.add_record(_record("Smoke 3", "smoke-3"))
+    check("Cambio anotado en el journal", os.path.exists(journal))
+    excel_db.invalidate_cache()
+    check("Journal reaplicado al releer", "smoke-3" in _keys())
+    excel_db.compact()
+    check("Journal integrado en el libro", not os.path.exists(journal))
+    excel_db.invalidate_cache()
+    check("Datos tras compactar", "smoke-3" in _keys())
+
+
+def run_conflict():
+    print("Compare-and-set con una versión antigua...")
+    version = excel_db.data_version()
+    excel_db.update_by_key("smoke-1", _record("Smoke 1c", "smoke-1"))
+    try:
+        excel_db.update_by_key("smoke-1", _record("Smoke 1d", "smoke-1"), expected_version=version)
+        check("ConflictError", False)
+    except excel_db.ConflictError:
+        check("ConflictError", True)
+    check("Sin cambios tras el conflicto", excel_db.get_record("smoke-1")[0] == "Smoke 1c")
+
+
+def run_export():
+    print("Exportando en todos los formatos...")
+    expected = len(excel_db.read_all())
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, ext in export.FORMATS.items():
+            path = os.path.join(tmp, "export" + ext)
+            count = export.export_rows(path)
+            opener = gzip.open if fmt == "csv.gz" else open
+            with opener(path, "rt", encoding="utf-8", newline="") as f:
+                if fmt == "jsonl":
+                    lines = [json.loads(line) for line in f]
+                else:
+                    lines = list(csv.reader(f))[1:]
+            check(f"Exportación {fmt}", count == expected == len(lines))
+
+
+def cleanup():
+    keys = [key for key in TEST_KEYS if excel_db.get_record(key) is not None]
+    if keys:
+        excel_db.delete_by_keys(keys)
+
 
 def run():
+    workdir = _use_temp_dir()
+    print(f"Usando directorio temporal {workdir}")
+    try:
+        _run()
+    finally:
+        # Integrar el journal ahora: al salir no queda nada que escribir en el directorio borrado
+        excel_db.compact()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run():
     print("Asegurando archivo de datos...")
     excel_db.ensure_file()
     rows = excel_db.read_all()
@@ -26,13 +159,25 @@ def run():
     rows = excel_db.read_all()
     print(f"Filas tras eliminar: {len(rows)}")
 
+    try:
+        run_batch()
+        run_keyed()
+        run_journal()
+        run_conflict()
+        run_export()
+    finally:
+        cleanup()
+
     print("Probando autenticación admin (admin/admin):", auth.authenticate("admin", "admin"))
 
     print("Probando generación de código de recuperación (modo dev) para admin@example.com")
-    code = email_utils.send_code("admin@example.com")
+    code, _sent = email_utils.send_code("admin@example.com")
     print("Código generado:", code)
     print("Verificación:", email_utils.verify_code("admin@example.com", code))
 
+    if failures:
+        print("Smoke test con fallos:", ", ".join(failures))
+        sys.exit(1)
     print("Smoke test finalizado")
 
 if __name__ == '__main__':
@@ -0,0 +1,254 @@
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from app import config
+from app import excel_db
+from app import fileutil
+
+logger = logging.getLogger(__name__)
+
+# Columnas de la tabla en el mismo orden que excel_db.HEADERS
+COLUMNS = ["nombre", "cedula", "cargo", "salario"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS empleados (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre,
+    cedula,
+    cargo,
+    salario
+);
+CREATE INDEX IF NOT EXISTS idx_empleados_cedula ON empleados(cedula);
+CREATE INDEX IF NOT EXISTS idx_empleados_cargo ON empleados(cargo);
+"""
+
+
+class SQLiteBackend:
+    """Motor de empleados en SQLite (modo WAL, índices por Cédula y Cargo).
+
+    El orden de los registros es el de inserción (id), de modo que los índices
+    de fila coinciden con los del motor Excel. Cada hilo usa su propia conexión.
+    """
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = path or config.DATA_SQLITE
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            is_new = not os.path.exists(self.path)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.depth = 0
+            if is_new and os.path.exists(config.DATA_EXCEL):
+                # Base nueva: se parte de los datos que ya hay en el Excel. Si la
+                # importación falla se borra la base para reintentarla al volver a abrir
+                try:
+                    excel_db.import_xlsx(config.DATA_EXCEL, backend=self)
+                except BaseException:
+                    conn.close()
+                    self._local.conn = None
+                    for path in (self.path, self.path + "-wal", self.path + "-shm"):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    raise
+        return conn
+
+    def _ids(self, conn):
+        return [r[0] for r in conn.execute("SELECT id FROM empleados ORDER BY id")]
+
+    def ensure_file(self):
+        self._conn()
+
+    def data_stamp(self):
+        # Con WAL cada commit modifica el archivo -wal aunque la base no cambie
+        return (fileutil.file_stamp(self.path), fileutil.file_stamp(self.path + "-wal"))
+
+    def data_files(self):
+        return [self.path, self.path + "-wal"]
+
+    def invalidate_cache(self):
+        pass
+
+    def compact(self):
+        self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+
+    def read_all(self):
+        cur = self._conn().execute(f"SELECT {', '.join(COLUMNS)} FROM empleados ORDER BY id")
+        return [list(row) for row in cur]
+
+    def iter_rows(self, start=0, limit=None, columns=None):
+        if columns is None:
+            cols = COLUMNS
+        else:
+            cols = [COLUMNS[excel_db.HEADERS.index(c) if isinstance(c, str) else c] for c in columns]
+        cur = self._conn().execute(
+            f"SELECT {', '.join(cols)} FROM empleados ORDER BY id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, start))
+        try:
+            for row in cur:
+                yield list(row)
+        finally:
+            cur.close()
+
+    def data_version(self):
+        return self._conn().execute("PRAGMA user_version").fetchone()[0]
+
+    @contextmanager
+    def batch(self, expected_version=None):
+        """Transacción de escritura; BEGIN IMMEDIATE bloquea a otros escritores."""
+        conn = self._conn()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        if expected_version is not None:
+            actual = self.data_version()
+            if actual != expected_version:
+                if self._local.depth == 0:
+                    conn.execute("ROLLBACK")
+                raise excel_db.ConflictError(expected_version, actual)
+        self._local.depth += 1
+        try:
+            yield
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute("COMMIT")
+
+    def import_rows(self, rows):
+        """Reemplaza toda la tabla por `rows` en una sola transacción.
+
+        Es la carga de datos heredados del Excel: las cédulas no se validan
+        (las vacías o repetidas se conservan tal cual) y se avisa de ellas en el
+        log. Devuelve los números de fila de la hoja con cédula vacía o repetida.
+        """
+        params, seen, suspicious = [], set(), []
+        for i, row in enumerate(rows):
+            values = (list(row) + [""] * len(COLUMNS))[:len(COLUMNS)]
+            key = excel_db.record_key(values)
+            if key is None or key in seen:
+                suspicious.append(i + 2)
+            seen.add(key)
+            values[COLUMNS.index("cedula")] = key
+            params.append(values)
+        with self.batch():
+            conn = self._conn()
+            conn.execute("DELETE FROM empleados")
+            conn.executemany(
+                f"INSERT INTO empleados ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?)", params)
+            self._bump_version(conn)
+        if suspicious:
+            logger.warning("Importadas %s filas con cédula vacía o repetida (filas de la hoja: %s)",
+                           len(suspicious), ", ".join(map(str, suspicious[:20])))
+        return suspicious
+
+    def _bump_version(self, conn):
+        # user_version forma parte de la transacción en curso
+        conn.execute(f"PRAGMA user_version = {self.data_version() + 1}")
+
+    def _row_values(self, record):
+        values = [record.get(h, "") for h in excel_db.HEADERS]
+        # La cédula se guarda normalizada para que las búsquedas por clave usen el índice
+        values[COLUMNS.index("cedula")] = excel_db.record_key(record)
+        return values
+
+    def _check_key(self, conn, key, row_id=None):
+        if key is None:
+            raise ValueError("La cédula no puede estar vacía")
+        found = conn.execute("SELECT id FROM empleados WHERE cedula = ? LIMIT 1", (key,)).fetchone()
+        if found is not None and found[0] != row_id:
+            raise ValueError(f"Ya existe un empleado con la cédula {key}")
+
+    def _id_for_key(self, conn, key):
+        found = conn.execute("SELECT id FROM empleados WHERE cedula = ? ORDER BY id LIMIT 1",
+                             (excel_db.normalize_key(key),)).fetchone()
+        if found is None:
+            raise KeyError(f"No existe un empleado con la cédula {key}")
+        return found[0]
+
+    def add_records(self, records):
+        with self.batch():
+            conn = self._conn()
+            params, seen = [], set()
+            for record in records:
+                key = excel_db.record_key(record)
+                if key in seen:
+                    raise ValueError(f"Ya existe un empleado con la cédula {key}")
+                self._check_key(conn, key)
+                seen.add(key)
+                params.append(self._row_values(record))
+            conn.executemany(
+                f"INSERT INTO empleados ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?)", params)
+            self._bump_version(conn)
+
+    def _update_ids(self, conn, pairs):
+        # Se valida contra las cédulas tal como quedarán tras todo el lote, de
+        # modo que dos filas pueden intercambiarse la cédula
+        pending = dict(pairs)
+        seen = set()
+        params = []
+        for row_id, record in pending.items():
+            key = excel_db.record_key(record)
+            if key is None:
+                raise ValueError("La cédula no puede estar vacía")
+            holders = conn.execute("SELECT id FROM empleados WHERE cedula = ?", (key,)).fetchall()
+            if key in seen or any(h[0] not in pending for h in holders):
+                raise ValueError(f"Ya existe un empleado con la cédula {key}")
+            seen.add(key)
+            params.append(self._row_values(record) + [row_id])
+        conn.executemany(
+            f"UPDATE empleados SET {', '.join(c + ' = ?' for c in COLUMNS)} WHERE id = ?", params)
+        self._bump_version(conn)
+
+    def update_records(self, updates):
+        if isinstance(updates, dict):
+            updates = updates.items()
+        with self.batch():
+            conn = self._conn()
+            ids = self._ids(conn)
+            pairs = []
+            for row_index, record in updates:
+                if not 0 <= row_index < len(ids):
+                    raise IndexError(f"Registro fuera de rango: {row_index}")
+                pairs.append((ids[row_index], record))
+            self._update_ids(conn, pairs)
+
+    def delete_records(self, row_indexes):
+        with self.batch():
+            conn = self._conn()
+            ids = self._ids(conn)
+            indexes = sorted(set(row_indexes))
+            for row_index in indexes:
+                if not 0 <= row_index < len(ids):
+                    raise IndexError(f"Registro fuera de rango: {row_index}")
+            conn.executemany("DELETE FROM empleados WHERE id = ?", [(ids[i],) for i in indexes])
+            self._bump_version(conn)
+
+    def get_record(self, key):
+        row = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM empleados WHERE cedula = ? ORDER BY id LIMIT 1",
+            (excel_db.normalize_key(key),)).fetchone()
+        return None if row is None else list(row)
+
+    def update_by_key(self, key, record):
+        with self.batch():
+            conn = self._conn()
+            self._update_ids(conn, [(self._id_for_key(conn, key), record)])
+
+    def delete_by_keys(self, keys):
+        with self.batch():
+            conn = self._conn()
+            ids = [self._id_for_key(conn, key) for key in keys]
+            conn.executemany("DELETE FROM empleados WHERE id = ?", [(i,) for i in ids])
+            self._bump_version(conn)
@@ -0,0 +1,296 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from app import config
+from app import filelock
+from app import fileutil
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    email TEXT,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+"""
+
+
+def _check_new(username_taken, email_taken):
+    if username_taken:
+        raise ValueError("El usuario ya existe")
+    if email_taken:
+        raise ValueError("El email ya está en uso")
+
+
+def _matches(info, expected):
+    return not expected or all(info.get(k) == v for k, v in expected.items())
+
+
+class JSONUserStore:
+    """Usuarios en un único users.json (formato original).
+
+    Cada cambio reescribe el archivo completo, pero de forma atómica (temporal
+    + os.replace) y con un bloqueo entre procesos para no perder escrituras
+    concurrentes. Se mantiene por compatibilidad; para muchos usuarios es
+    preferible SQLiteUserStore.
+    """
+    name = "json"
+
+    def __init__(self, path=None):
+        self.path = path or config.USERS_FILE
+
+    def stamp(self):
+        return fileutil.file_stamp(self.path)
+
+    def _read(self):
+        # Como load(), pero un archivo ilegible lanza la excepción en vez de dar {}
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            users = json.load(f)
+        if not isinstance(users, dict):
+            raise ValueError(f"{self.path} no contiene un objeto JSON de usuarios")
+        return users
+
+    def load(self):
+        try:
+            return self._read()
+        except Exception as e:
+            logger.exception("Error leyendo %s: %s", self.path, e)
+            return {}
+
+    def _write(self, users):
+        with fileutil.atomic_write(self.path, fsync=True, encoding="utf-8") as f:
+            json.dump(users, f, indent=2, ensure_ascii=False)
+
+    def _transaction(self, change):
+        with filelock.locked(self.path + ".lock"):
+            before = self.stamp()
+            users = self.load()
+            if change(users) is False:
+                return None
+            self._write(users)
+            return before, self.stamp()
+
+    def add(self, username, info):
+        return self.add_many({username: info})
+
+    def add_many(self, new_users):
+        def change(users):
+            emails = {u.get("email") for u in users.values()}
+            for username, info in new_users.items():
+                _check_new(username in users, info.get("email") in emails)
+                users[username] = dict(info)
+                emails.add(info.get("email"))
+        return self._transaction(change)
+
+    def put(self, username, info):
+        def change(users):
+            users[username] = dict(info)
+        return self._transaction(change)
+
+    def update(self, username, fields, expected=None):
+        def change(users):
+            if username not in users or not _matches(users[username], expected):
+                return False
+            users[username].update(fields)
+        return self._transaction(change)
+
+    def delete(self, username):
+        return self._transaction(lambda users: users.pop(username, None) is not None)
+
+    def replace_all(self, users):
+        def change(current):
+            current.clear()
+            current.update(users)
+        return self._transaction(change)
+
+
+class SQLiteUserStore:
+    """Usuarios en SQLite (modo WAL): cada cambio actualiza solo su fila.
+
+    PRAGMA user_version hace de versión y crece con cada escritura, de modo que
+    stamp() detecta también los cambios de otros procesos. Si la base no
+    existe y hay un users.json, se importa al crearla.
+    """
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = path or config.USERS_DB
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            is_new = not os.path.exists(self.path)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            # user_version 0: nunca se escribió (base nueva o migración cortada antes del COMMIT)
+            never_written = conn.execute("PRAGMA user_version").fetchone()[0] == 0
+            if never_written and os.path.exists(config.USERS_FILE):
+                # Un users.json ilegible no cuenta como "cero usuarios": se aborta y,
+                # si la base la creó este intento, se borra para reintentar al volver a abrir
+                try:
+                    users = JSONUserStore(config.USERS_FILE)._read()
+                    self.replace_all(users)
+                except BaseException:
+                    conn.close()
+                    self._local.conn = None
+                    if is_new:
+                        for path in (self.path, self.path + "-wal", self.path + "-shm"):
+                            if os.path.exists(path):
+                                os.remove(path)
+                    raise
+                logger.info("Migrados %s usuarios de %s a %s", len(users), config.USERS_FILE, self.path)
+        return conn
+
+    def stamp(self):
+        return self._conn().execute("PRAGMA user_version").fetchone()[0]
+
+    def load(self):
+        users = {}
+        for username, password, email, extra in self._conn().execute(
+                "SELECT username, password, email, extra FROM users ORDER BY rowid"):
+            info = json.loads(extra) if extra and extra != "{}" else {}
+            info["password"] = password
+            info["email"] = email
+            users[username] = info
+        return users
+
+    def _transaction(self, change):
+        # BEGIN IMMEDIATE bloquea a otros escritores hasta el COMMIT
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.stamp()
+            if change(conn) is False:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(f"PRAGMA user_version = {before + 1}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return before, before + 1
+
+    @staticmethod
+    def _row(username, info):
+        extra = {k: v for k, v in info.items() if k not in ("password", "email")}
+        return (username, info.get("password"), info.get("email"),
+                json.dumps(extra, ensure_ascii=False) if extra else "{}")
+
+    def _insert(self, conn, users):
+        conn.executemany("INSERT INTO users (username, password, email, extra) VALUES (?, ?, ?, ?)",
+                         [self._row(u, info) for u, info in users.items()])
+
+    def add(self, username, info):
+        return self.add_many({username: info})
+
+    def add_many(self, new_users):
+        def change(conn):
+            emails = set()
+            for username, info in new_users.items():
+                email = info.get("email")
+                taken = conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone()
+                in_use = email in emails or conn.execute(
+                    "SELECT 1 FROM users WHERE email = ? LIMIT 1", (email,)).fetchone() is not None
+                _check_new(taken is not None, in_use)
+                emails.add(email)
+            self._insert(conn, new_users)
+        return self._transaction(change)
+
+    def put(self, username, info):
+        def change(conn):
+            conn.execute("INSERT OR REPLACE INTO users (username, password, email, extra) VALUES (?, ?, ?, ?)",
+                         self._row(username, info))
+        return self._transaction(change)
+
+    def update(self, username, fields, expected=None):
+        def change(conn):
+            row = conn.execute("SELECT password, email, extra FROM users WHERE username = ?",
+                               (username,)).fetchone()
+            if row is None:
+                return False
+            info = json.loads(row[2]) if row[2] else {}
+            info.update(password=row[0], email=row[1])
+            if not _matches(info, expected):
+                return False
+            info.update(fields)
+            _, password, email, extra = self._row(username, info)
+            conn.execute("UPDATE users SET password = ?, email = ?, extra = ? WHERE username = ?",
+                         (password, email, extra, username))
+        return self._transaction(change)
+
+    def delete(self, username):
+        return self._transaction(
+            lambda conn: conn.execute("DELETE FROM users WHERE username = ?", (username,)).rowcount > 0)
+
+    def replace_all(self, users):
+        def change(conn):
+            conn.execute("DELETE FROM users")
+            self._insert(conn, users)
+        return self._transaction(change)
+
+
+# Almacenes ya creados, por (nombre, ruta) para respetar cambios en config
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    """Almacén de usuarios elegido en config.USERS_BACKEND ("sqlite" o "json").
+
+    Todos exponen stamp() (cambia con cada escritura, también de otros
+    procesos), load() -> {usuario: {"password", "email", ...}} y las
+    escrituras add, add_many (varias altas en una sola transacción), put (alta
+    o reemplazo sin comprobaciones), update (con expected={campo: valor} solo
+    si la fila aún tiene esos valores), delete y replace_all. Cada
+    escritura es atómica y devuelve (stamp anterior, stamp nuevo), o None si no
+    cambió nada; add y add_many lanzan ValueError si un usuario o email ya
+    existen, y entonces no se guarda nada.
+    """
+    name = config.USERS_BACKEND
+    path = config.USERS_DB if name == "sqlite" else config.USERS_FILE
+    with _stores_lock:
+        store = _stores.get((name, path))
+        if store is None:
+            if name == "sqlite":
+                store = SQLiteUserStore(path)
+            elif name == "json":
+                store = JSONUserStore(path)
+            else:
+                raise ValueError(f"Almacén de usuarios desconocido: {name}")
+            _stores[(name, path)] = store
+    return store
+
+
+def migrate(source, target):
+    """Copia todos los usuarios de source a target (reemplazando los de target)."""
+    users = source.load()
+    target.replace_all(users)
+    return len(users)
+
+
+if __name__ == '__main__':
+    import argparse
+    p = argparse.ArgumentParser(description="Migrar usuarios entre users.json y el almacén configurado")
+    p.add_argument("accion", choices=["import", "export"],
+                   help="import: users.json -> almacén; export: almacén -> users.json")
+    p.add_argument("ruta", nargs="?", help="Archivo JSON (por defecto config.USERS_FILE)")
+    args = p.parse_args()
+    json_store = JSONUserStore(args.ruta)
+    store = get_store()
+    if args.accion == "import":
+        count = migrate(json_store, store)
+        print(f"Importados {count} usuarios desde {json_store.path}")
+    else:
+        count = migrate(store, json_store)
+        print(f"Exportados {count} usuarios a {json_store.path}")
@@ -0,0 +1,194 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from collections import namedtuple
+from app import excel_db
+
+logger = logging.getLogger(__name__)
+
+# Máscara inotify: escrituras cerradas, renombrados (os.replace), altas y bajas
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+RowDiff = namedtuple("RowDiff", "added removed changed")
+RowDiff.__doc__ = """Diferencia por filas entre dos lecturas de la tabla.
+
+added y changed son listas de (posición en la tabla nueva, fila); removed es la
+lista de claves que ya no existen. Las filas sin cédula se identifican por su
+posición, con claves ("#", posición).
+"""
+
+
+def _row_key(i, row):
+    key = excel_db.record_key(row)
+    return ("#", i) if key is None else key
+
+
+def diff_rows(old, new):
+    """Compara dos listas de filas por cédula y devuelve un RowDiff."""
+    old_by_key = {_row_key(i, row): row for i, row in enumerate(old or [])}
+    added, changed, seen = [], [], set()
+    for i, row in enumerate(new):
+        key = _row_key(i, row)
+        seen.add(key)
+        previous = old_by_key.get(key)
+        if previous is None:
+            added.append((i, row))
+        elif list(previous) != list(row):
+            changed.append((i, row))
+    removed = [key for key in old_by_key if key not in seen]
+    return RowDiff(added, removed, changed)
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class FileWatcher:
+    """Vigila los archivos de datos en un hilo y llama a callback() cuando cambian.
+
+    En Linux usa inotify sobre los directorios de los archivos (así se ven
+    también los reemplazos con os.replace); en otros sistemas, o si inotify no
+    está disponible, sondea con un intervalo que crece de min_interval a
+    max_interval mientras no hay cambios y vuelve al mínimo tras uno. Las
+    ráfagas de escrituras se agrupan: solo se avisa cuando no ha habido
+    actividad durante `debounce` segundos, y solo si stamp() cambió de verdad.
+
+    callback se ejecuta en el hilo del vigilante; la interfaz debe pasarlo a su
+    propio hilo (p. ej. con after()).
+    """
+
+    def __init__(self, callback, paths=None, stamp=None, debounce=0.3,
+                 min_interval=0.5, max_interval=5.0, use_inotify=True):
+        self.callback = callback
+        self.paths = [os.path.abspath(p) for p in (paths or excel_db.data_files())]
+        self.stamp = stamp or excel_db.data_stamp
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._libc = _load_inotify() if use_inotify else None
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = None
+        self.mode = None
+
+    def start(self):
+        self._last = self.stamp()
+        self._thread = threading.Thread(target=self._run, name="FileWatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # El hilo termina en su próxima espera (como mucho max_interval)
+        self._stop.set()
+
+    def mark_seen(self):
+        """Toma el estado actual como visto (p. ej. tras escribir nosotros mismos)."""
+        self._last = self.stamp()
+
+    def _check(self):
+        stamp = self.stamp()
+        if stamp == self._last:
+            return False
+        self._last = stamp
+        try:
+            self.callback()
+        except Exception:
+            logger.exception("Error notificando cambios en %s", self.paths)
+        return True
+
+    def _run(self):
+        fd = self._inotify_open()
+        try:
+            if fd is not None:
+                self.mode = "inotify"
+                self._run_inotify(fd)
+            else:
+                self.mode = "poll"
+                self._run_poll()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _inotify_open(self):
+        if self._libc is None:
+            return None
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        for d in {os.path.dirname(p) for p in self.paths}:
+            if self._libc.inotify_add_watch(fd, os.fsencode(d), _IN_MASK) < 0:
+                logger.warning("inotify no disponible para %s; se usará sondeo", d)
+                os.close(fd)
+                return None
+        return fd
+
+    def _drain(self, fd):
+        """Lee los eventos pendientes; True si alguno afecta a nuestros archivos."""
+        names = {os.path.basename(p) for p in self.paths}
+        hit = False
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return hit
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                _, _, _, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+                if os.fsdecode(name) in names:
+                    hit = True
+                pos += _EVENT.size + length
+
+    def _run_inotify(self, fd):
+        while not self._stop.is_set():
+            # El tiempo máximo de espera hace de red de seguridad (p. ej. en NFS)
+            ready, _, _ = select.select([fd], [], [], self.max_interval)
+            if self._stop.is_set():
+                return
+            if ready and not self._drain(fd):
+                continue
+            # Esperar a que termine la ráfaga de escrituras
+            while select.select([fd], [], [], self.debounce)[0] and not self._stop.is_set():
+                self._drain(fd)
+            self._check()
+
+    def _run_poll(self):
+        interval = self.min_interval
+        while not self._stop.wait(interval):
+            stamp = self.stamp()
+            if stamp == self._last:
+                interval = min(interval * 1.5, self.max_interval)
+                continue
+            # Esperar a que el archivo deje de cambiar antes de avisar
+            while not self._stop.wait(self.debounce):
+                current = self.stamp()
+                if current == stamp:
+                    break
+                stamp = current
+            self._check()
+            interval = self.min_interval
+
+
+def watch(callback, **kwargs):
+    """Crea y arranca un FileWatcher sobre los archivos del motor actual."""
+    return FileWatcher(callback, **kwargs).start()
@@ -1,5 +1,14 @@
 import tkinter as tk
 
+
+def _round_rect_points(x1, y1, x2, y2, r):
+    # Polygon with every corner point doubled: with smooth=True Tk draws the corners as curves
+    return [x1 + r, y1, x1 + r, y1, x2 - r, y1, x2 - r, y1, x2, y1, x2, y1 + r,
+            x2, y1 + r, x2, y2 - r, x2, y2 - r, x2, y2, x2 - r, y2, x2 - r, y2,
+            x1 + r, y2, x1 + r, y2, x1, y2, x1, y2 - r, x1, y2 - r, x1, y1 + r,
+            x1, y1 + r, x1, y1]
+
+
 class NeuButton(tk.Canvas):
     """A simple rounded-corner button implemented on a Canvas.
 
@@ -35,15 +44,17 @@ class NeuButton(tk.Canvas):
         # focus visuals
         self.bind('<FocusIn>', lambda e: self._on_enter())
         self.bind('<FocusOut>', lambda e: self._on_leave())
+        # Canvas items are created once; state changes only update them with itemconfigure
+        self._shape_item = None
+        self._text_item = None
+        self._shape_key = None
         self._draw()
 
     def _draw(self):
-        self.delete('all')
         w = int(self['width'])
         h = int(self['height'])
-        r = self.radius
         fill_color = self.bg
-        outline_color = None
+        outline_color = 'black'
         outline_width = self.border
         if self._pressed:
             # slightly darker fill when pressed
@@ -55,24 +66,27 @@ class NeuButton(tk.Canvas):
         if self.border == 0:
             outline_color = ''
             outline_width = 0
-        # draw rounded rectangle (fill + border)
-        self.create_round_rect(0, 0, w, h, r, fill=fill_color, outline=outline_color, width=outline_width)
-        # draw text
-        self.create_text(w//2, h//2, text=self.text, fill=self.fg, font=self.font, tags='label')
+        key = (w, h, self.radius, fill_color, outline_color, outline_width)
+        if key == self._shape_key:
+            return
+        self._shape_key = key
+        # keep the whole border inside the canvas: Tk centers the outline on the edge
+        inset = outline_width / 2
+        box = (inset, inset, w - inset, h - inset)
+        style = dict(fill=fill_color, outline=outline_color, width=outline_width)
+        if self._shape_item is None:
+            # draw rounded rectangle (fill + border)
+            self._shape_item = self.create_round_rect(*box, self.radius, **style)
+            # draw text
+            self._text_item = self.create_text(w//2, h//2, text=self.text, fill=self.fg, font=self.font, tags='label')
+        else:
+            self.coords(self._shape_item, *_round_rect_points(*box, self.radius))
+            self.itemconfigure(self._shape_item, **style)
+            self.coords(self._text_item, w//2, h//2)
 
     def create_round_rect(self, x1, y1, x2, y2, r, **kwargs):
-        # Draw using arcs and rectangles to ensure crisp rounded corners
-        # corners: use create_arc for each corner then rectangles
-        items = []
-        # center rectangle
-        items.append(self.create_rectangle(x1 + r, y1, x2 - r, y2, **kwargs))
-        items.append(self.create_rectangle(x1, y1 + r, x2, y2 - r, **kwargs))
-        # corners (arcs)
-        items.append(self.create_arc(x1, y1, x1 + 2*r, y1 + 2*r, start=90, extent=90, style='pieslice', **kwargs))
-        items.append(self.create_arc(x2 - 2*r, y1, x2, y1 + 2*r, start=0, extent=90, style='pieslice', **kwargs))
-        items.append(self.create_arc(x2 - 2*r, y2 - 2*r, x2, y2, start=270, extent=90, style='pieslice', **kwargs))
-        items.append(self.create_arc(x1, y2 - 2*r, x1 + 2*r, y2, start=180, extent=90, style='pieslice', **kwargs))
-        return items
+        # One smoothed polygon: fill and border change together with a single itemconfigure
+        return self.create_polygon(_round_rect_points(x1, y1, x2, y2, r), smooth=True, **kwargs)
 
     def _on_enter(self):
         self._hover = True
@@ -100,14 +114,169 @@ class NeuButton(tk.Canvas):
     def config(self, **kwargs):
         if 'text' in kwargs:
             self.text = kwargs.pop('text')
+            if self._text_item is not None:
+                self.itemconfigure(self._text_item, text=self.text)
         if 'command' in kwargs:
             self.command = kwargs.pop('command')
         super().config(**kwargs)
+        if 'width' in kwargs or 'height' in kwargs:
+            self._draw()
 
     def set_state(self, state):
         if state == 'disabled':
             self.unbind("<ButtonPress-1>")
             self.configure(cursor='arrow')
         else:
-            # no-op
-            pass
+            self.bind("<ButtonPress-1>", lambda e: self._on_press())
+            self.configure(cursor='hand2')
+
+
+class Spinner(tk.Label):
+    """Small animated busy indicator; start() / stop() from the Tk thread."""
+
+    FRAMES = '⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏'
+
+    def __init__(self, master, text='', interval=80, **kwargs):
+        kwargs.setdefault('bg', master.cget('bg'))
+        super().__init__(master, text='', **kwargs)
+        self.message = text
+        self.interval = interval
+        self._frame = 0
+        self._after = None
+
+    def start(self, text=None):
+        if text is not None:
+            self.message = text
+        if self._after is None:
+            self._tick()
+
+    def stop(self):
+        if self._after is not None:
+            self.after_cancel(self._after)
+            self._after = None
+        self.config(text='')
+
+    def _tick(self):
+        self.config(text=f"{self.FRAMES[self._frame]} {self.message}")
+        self._frame = (self._frame + 1) % len(self.FRAMES)
+        self._after = self.after(self.interval, self._tick)
+
+
+def when_done(widget, future, callback):
+    """Call callback(future) on the Tk thread once `future` finishes."""
+    def done(f):
+        try:
+            widget.after(0, lambda: callback(f))
+        except (RuntimeError, tk.TclError):
+            pass  # the window was closed meanwhile
+    future.add_done_callback(done)
+
+
+class VirtualList(tk.Frame):
+    """A scrollable vertical list that only creates widgets for visible items.
+
+    `factory(parent)` must return a widget with a `bind_row(*item)` method. A
+    small pool of those widgets (enough to fill the viewport) is placed on a
+    canvas and re-bound to other items as the user scrolls, so build time and
+    memory do not grow with the number of items. All items share one height,
+    measured from the first widget unless `item_height` is given. The
+    scrollbar reflects the full list.
+    """
+
+    def __init__(self, master, factory, item_height=None, spacing=20, padx=6, **kwargs):
+        bg = kwargs.pop('bg', master.cget('bg'))
+        super().__init__(master, bg=bg, **kwargs)
+        self.factory = factory
+        self.item_height = item_height
+        self.spacing = spacing
+        self.padx = padx
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas.bind('<Configure>', lambda e: self._update_region())
+        self._bind_wheel(self.canvas)
+        self._items = []
+        # pool entries: [widget, canvas window id, item currently bound]
+        self._pool = []
+        self._layout_after = None
+
+    def set_items(self, items):
+        """Replace the items; the scroll position is kept when possible."""
+        self._items = items
+        self._update_region()
+
+    def widgets(self):
+        """The pooled widgets (about one viewport's worth, whatever the item count)."""
+        return [w for w, _, _ in self._pool]
+
+    def _stride(self):
+        return self.item_height + self.spacing
+
+    def _new_widget(self):
+        widget = self.factory(self.canvas)
+        window = self.canvas.create_window(self.padx, 0, window=widget, anchor='nw', state='hidden')
+        self._bind_wheel(widget)
+        entry = [widget, window, None]
+        self._pool.append(entry)
+        return entry
+
+    def _measure(self):
+        entry = self._pool[0] if self._pool else self._new_widget()
+        entry[0].bind_row(*self._items[0])
+        entry[2] = self._items[0]
+        entry[0].update_idletasks()
+        self.item_height = entry[0].winfo_reqheight()
+
+    def _update_region(self):
+        if self._items and self.item_height is None:
+            self._measure()
+        height = len(self._items) * self._stride() if self._items else 0
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height),
+                              yscrollincrement=self._stride() if self.item_height else 0)
+        self._schedule_layout()
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_layout()
+
+    def _schedule_layout(self):
+        # Scrolling fires many events per frame; lay out once when Tk is idle
+        if self._layout_after is None:
+            self._layout_after = self.after_idle(self._layout)
+
+    def _layout(self):
+        self._layout_after = None
+        items = self._items
+        first = last = 0
+        if items:
+            stride = self._stride()
+            top = max(0, self.canvas.canvasy(0))
+            first = min(len(items), int(top // stride))
+            last = min(len(items), int((top + self.canvas.winfo_height()) // stride) + 1)
+            while len(self._pool) < last - first:
+                self._new_widget()
+        width = max(1, self.canvas.winfo_width() - 2 * self.padx)
+        for slot, entry in enumerate(self._pool):
+            widget, window, bound = entry
+            i = first + slot
+            if i >= last:
+                entry[2] = None
+                self.canvas.itemconfigure(window, state='hidden')
+                continue
+            if bound is not items[i]:
+                widget.bind_row(*items[i])
+                entry[2] = items[i]
+            self.canvas.coords(window, self.padx, i * stride + self.spacing // 2)
+            self.canvas.itemconfigure(window, width=width, height=self.item_height, state='normal')
+
+    def _bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', self._on_wheel, add='+')
+        widget.bind('<Button-4>', lambda e: self.canvas.yview_scroll(-1, 'units'), add='+')
+        widget.bind('<Button-5>', lambda e: self.canvas.yview_scroll(1, 'units'), add='+')
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def _on_wheel(self, e):
+        self.canvas.yview_scroll(-1 if e.delta > 0 else 1, 'units')